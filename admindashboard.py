@@ -2,7 +2,7 @@
 import sys
 import os
 import time
-from datetime import datetime
+from datetime import datetime, timedelta
 
 # For Streamlit Cloud environment
 PROJECT_ROOT = "/mount/src/mukhayum-scoreboard"
@@ -20,7 +20,17 @@ import numpy as np
 import plotly.express as px
 
 # Import from shared module - ONLY THESE FUNCTIONS
-from shared.data_loader import get_team_data, get_student_data, get_weekly_data, get_special_achievements
+from shared.data_loader import (
+    DATASET_SOURCES, MONTH_SHEETS, clear_cache, load_snapshot, load_dataset, prefetch,
+    get_team_data, get_student_data, get_student_table, get_achievements_index,
+    get_team_history
+)
+from shared.cell_values import bad_cells, format_points
+from shared.envelope import content_hash, diff
+from shared.metrics import metrics
+from shared.refresher import get_refresher, start_refresher
+from shared.render_cache import render_cache
+from shared.roster import PAGE_SIZES
 # ========== END IMPORTS ==========
 
 # Page configuration
@@ -31,6 +41,25 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Keep the scoreboard snapshot hot so renders never wait on Google Sheets
+start_refresher()
+
+# Loader calls made by this rerun, summarised in the sidebar at the end
+rerun_metrics = metrics.collect()
+
+# Only the selected view runs; the others are warmed once it has been drawn
+VIEWS = ["🏆 Team Leaderboard", "📅 Weekly Breakdown", "👥 Student Performance", "🎯 Special Achievements"]
+PREFETCH = {
+    VIEWS[1]: ('weekly', lambda: load_dataset('weekly')),
+    VIEWS[2]: ('students', lambda: get_student_table(load_snapshot(DATASET_SOURCES['students'], months=()))),
+    VIEWS[3]: ('achievements', lambda: get_achievements_index(MONTH_SHEETS)),
+}
+
+# Keyed widgets of views that are not shown keep their values for when they are
+for key in ('history_span', 'student_page'):
+    if key in st.session_state:
+        st.session_state[key] = st.session_state[key]
+
 
 # ========== CUSTOM CSS ==========
 st.markdown("""
@@ -59,18 +88,6 @@ st.markdown("""
         border-left: 5px solid #4F46E5;
         margin-bottom: 10px;
     }
-    .stTabs [data-baseweb="tab-list"] {
-        gap: 2px;
-    }
-    .stTabs [data-baseweb="tab"] {
-        height: 50px;
-        white-space: pre-wrap;
-        background-color: #F3F4F6;
-        border-radius: 5px 5px 0px 0px;
-        gap: 1px;
-        padding-top: 10px;
-        padding-bottom: 10px;
-    }
 </style>
 """, unsafe_allow_html=True)
 
@@ -85,35 +102,73 @@ with st.sidebar:
     if st.button("🔄 Refresh Now"):
         st.cache_data.clear()
         st.cache_resource.clear()
+        clear_cache()
+        refresher = get_refresher()
+        if refresher is not None:
+            refresher.refresh_now(wait=True)
         st.rerun()
     
     st.markdown("---")
     st.markdown("### 📊 Data Status")
     
+    # Team totals only; every other view loads what it shows
+    snapshot = load_snapshot(DATASET_SOURCES['teams'], months=())
+    
     # Test connection by calling get_team_data, not get_google_sheet
     try:
-        df = get_team_data()
-        last_update = datetime.now().strftime("%H:%M:%S")
+        df = get_team_data(snapshot)
+        last_update = snapshot.fetched_at_of(DATASET_SOURCES['teams']).strftime("%H:%M:%S")
         if not df.empty:
-            st.success(f"✅ Connected to Google Sheets")
+            if snapshot.source == 'store':
+                st.warning("⚠️ Google Sheets unreachable, showing saved data")
+            elif snapshot.source == 'seed':
+                st.info("⏳ Showing saved data while Google Sheets is read")
+            else:
+                st.success(f"✅ Connected to Google Sheets")
             st.caption(f"Last update: {last_update}")
             st.caption(f"Teams loaded: {len(df)}")
         else:
             st.warning("⚠️ No team data found")
     except Exception as e:
         st.error(f"❌ Connection failed: {e}")
+    
+    refresher = get_refresher()
+    if refresher is not None and refresher.follow:
+        role = "receiving edits" if refresher.ingest is not None else "following the shared store"
+        st.caption(f"Push updates on, {role}")
+    
+    # Filled in once every tab has loaded its data
+    metrics_slot = st.empty()
 
 # ========== MAIN CONTENT ==========
 st.markdown('<h1 class="main-header">📖 Quran Live Scoreboard</h1>', unsafe_allow_html=True)
 
-# Create tabs
-tab1, tab2, tab3, tab4 = st.tabs(["🏆 Team Leaderboard", "📅 Weekly Breakdown", "👥 Student Performance", "🎯 Special Achievements"])
+# Pick a view
+view = st.radio("View", VIEWS, horizontal=True, key='view', label_visibility="collapsed")
 
-# ========== TAB 1: TEAM LEADERBOARD ==========
-with tab1:
+# ========== VIEW 1: TEAM LEADERBOARD ==========
+if view == VIEWS[0]:
     st.header("🏆 Live Team Leaderboard")
     
-    team_df = get_team_data()
+    teams = load_dataset('teams', snapshot)
+    team_df = teams.data.copy()
+    
+    # What changed the last time the standings did, for this session
+    previous = st.session_state.get('teams_envelope')
+    if previous is not None and previous.version != teams.version:
+        lines = [
+            f"{team}: " + ", ".join(
+                f"{format_points(old)} → {format_points(new)} points" if column == 'points' else f"rank #{old} → #{new}"
+                for column, (old, new) in columns.items()
+            )
+            for team, columns in diff(previous, teams).changed.items()
+        ]
+        if lines:
+            st.session_state.team_changes = (datetime.now(), lines)
+    st.session_state.teams_envelope = teams
+    if st.session_state.get('team_changes'):
+        changed_at, lines = st.session_state.team_changes
+        st.info(f"🔔 Changed at {changed_at:%H:%M:%S}: " + "; ".join(lines))
     
     if not team_df.empty:
         # Team information
@@ -162,7 +217,7 @@ with tab1:
                     <h3 style="margin: 0; color: #666; font-size: 1rem;">Rank #{team['rank']}</h3>
                     <h2 style="margin: 10px 0; color: #333; font-size: 1.8rem; direction: rtl;">{team['team']}</h2>
                     <p style="margin: 0; color: #666; font-size: 0.9rem;">{info['en']}</p>
-                    <h1 style="margin: 15px 0; color: {info['border_color']}; font-size: 3rem;">{team['points']:,.0f}</h1>
+                    <h1 style="margin: 15px 0; color: {info['border_color']}; font-size: 3rem;">{format_points(team['points'])}</h1>
                     <p style="margin: 0; color: #666;">Total Points</p>
                 </div>
                 """, unsafe_allow_html=True)
@@ -173,22 +228,26 @@ with tab1:
         # Add English names for chart
         team_df['team_display'] = team_df['team'].map(lambda x: team_info.get(x, {}).get('en', x))
         
-        fig = px.bar(team_df, x='team_display', y='points', 
-                    color='team',
-                    color_discrete_map={
-                        'الشمس': '#FF6B6B',
-                        'القمر': '#4ECDC4',
-                        'الزهرة': '#FFD166',
-                        'المشتري': '#06D6A0'
-                    })
-        fig.update_layout(
-            height=400, 
-            showlegend=False,
-            xaxis_title="Team",
-            yaxis_title="Total Points",
-            plot_bgcolor='white'
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        def team_chart():
+            fig = px.bar(team_df, x='team_display', y='points', 
+                        color='team',
+                        color_discrete_map={
+                            'الشمس': '#FF6B6B',
+                            'القمر': '#4ECDC4',
+                            'الزهرة': '#FFD166',
+                            'المشتري': '#06D6A0'
+                        })
+            fig.update_layout(
+                height=400, 
+                showlegend=False,
+                xaxis_title="Team",
+                yaxis_title="Total Points",
+                plot_bgcolor='white'
+            )
+            return fig
+        
+        # Built once per version of the standings, not on every rerun
+        st.plotly_chart(render_cache.get('team_chart', teams.version, team_chart), use_container_width=True)
         
         # Show raw data
         with st.expander("View Team Data Details"):
@@ -197,11 +256,12 @@ with tab1:
     else:
         st.warning("No team data found.")
 
-# ========== TAB 2: WEEKLY BREAKDOWN ==========
-with tab2:
+# ========== VIEW 2: WEEKLY BREAKDOWN ==========
+elif view == VIEWS[1]:
     st.header("📅 Weekly Breakdown")
     
-    weekly_df = get_weekly_data()
+    weekly = load_dataset('weekly')
+    weekly_df = weekly.data.copy()
     
     if not weekly_df.empty:
         # Data explanation
@@ -270,7 +330,7 @@ with tab2:
                         'المشتري': '🪐'
                     }.get(row['team'], '🏆')
                     
-                    st.caption(f"{team_icon} {row['team']}: **{row['points']:.0f}** pts")
+                    st.caption(f"{team_icon} {row['team']}: **{format_points(row['points'], '.0f')}** pts")
         
         # Main visualization section
         st.subheader("📈 Visualization Options")
@@ -295,93 +355,97 @@ with tab2:
         weekly_df['week'] = pd.Categorical(weekly_df['week'], categories=week_order, ordered=True)
         weekly_df = weekly_df.sort_values(['team', 'week'])
         
-        if viz_option == "All Weeks (Log Scale)":
-            # Chart 1: All weeks with log scale
-            fig = px.line(weekly_df, x='week', y='points', color='team',
-                         color_discrete_map=team_colors,
-                         markers=True,
-                         line_shape='linear')
-            
-            fig.update_layout(
-                height=500,
-                xaxis_title="Week",
-                yaxis_title="Points (Log Scale)",
-                yaxis_type="log",
-                hovermode='x unified',
-                plot_bgcolor='white',
-                legend_title="Team"
-            )
+        def weekly_chart():
+            if viz_option == "All Weeks (Log Scale)":
+                # Chart 1: All weeks with log scale
+                fig = px.line(weekly_df, x='week', y='points', color='team',
+                             color_discrete_map=team_colors,
+                             markers=True,
+                             line_shape='linear')
+                
+                fig.update_layout(
+                    height=500,
+                    xaxis_title="Week",
+                    yaxis_title="Points (Log Scale)",
+                    yaxis_type="log",
+                    hovermode='x unified',
+                    plot_bgcolor='white',
+                    legend_title="Team"
+                )
+                
+                # Add grid
+                fig.update_xaxes(showgrid=True, gridwidth=1, gridcolor='#f0f0f0')
+                fig.update_yaxes(showgrid=True, gridwidth=1, gridcolor='#f0f0f0')
             
-            # Add grid
-            fig.update_xaxes(showgrid=True, gridwidth=1, gridcolor='#f0f0f0')
-            fig.update_yaxes(showgrid=True, gridwidth=1, gridcolor='#f0f0f0')
+            elif viz_option == "Weeks 2-5 Only":
+                # Chart 2: Weeks 2-5 only
+                weeks_2_5_df = weekly_df[weekly_df['week'].isin(['Week 2', 'Week 3', 'Week 4', 'Week 5'])]
+                
+                fig = px.line(weeks_2_5_df, x='week', y='points', color='team',
+                             color_discrete_map=team_colors,
+                             markers=True,
+                             line_shape='linear')
+                
+                fig.update_layout(
+                    height=500,
+                    xaxis_title="Week",
+                    yaxis_title="Points",
+                    hovermode='x unified',
+                    plot_bgcolor='white',
+                    legend_title="Team"
+                )
+                
+                # Add grid
+                fig.update_xaxes(showgrid=True, gridwidth=1, gridcolor='#f0f0f0')
+                fig.update_yaxes(showgrid=True, gridwidth=1, gridcolor='#f0f0f0')
             
-            st.plotly_chart(fig, use_container_width=True)
+            else:  # Comparison View
+                # Bar chart comparison
+                fig = px.bar(weekly_df, x='week', y='points', color='team',
+                            color_discrete_map=team_colors,
+                            barmode='group')
+                
+                fig.update_layout(
+                    height=500,
+                    xaxis_title="Week",
+                    yaxis_title="Points",
+                    hovermode='x unified',
+                    plot_bgcolor='white',
+                    legend_title="Team"
+                )
+            return fig
+        
+        fig = render_cache.get('weekly_chart', weekly.version, weekly_chart, view=viz_option)
+        st.plotly_chart(fig, use_container_width=True)
+        if viz_option == "All Weeks (Log Scale)":
             st.caption("Note: Log scale used to better show both Week 1 (500-600+) and Weeks 2-5 (20-30+)")
-            
-        elif viz_option == "Weeks 2-5 Only":
-            # Chart 2: Weeks 2-5 only
-            weeks_2_5_df = weekly_df[weekly_df['week'].isin(['Week 2', 'Week 3', 'Week 4', 'Week 5'])]
-            
-            fig = px.line(weeks_2_5_df, x='week', y='points', color='team',
-                         color_discrete_map=team_colors,
-                         markers=True,
-                         line_shape='linear')
-            
-            fig.update_layout(
-                height=500,
-                xaxis_title="Week",
-                yaxis_title="Points",
-                hovermode='x unified',
-                plot_bgcolor='white',
-                legend_title="Team"
-            )
-            
-            # Add grid
-            fig.update_xaxes(showgrid=True, gridwidth=1, gridcolor='#f0f0f0')
-            fig.update_yaxes(showgrid=True, gridwidth=1, gridcolor='#f0f0f0')
-            
-            st.plotly_chart(fig, use_container_width=True)
-            
-        else:  # Comparison View
-            # Bar chart comparison
-            fig = px.bar(weekly_df, x='week', y='points', color='team',
-                        color_discrete_map=team_colors,
-                        barmode='group')
-            
-            fig.update_layout(
-                height=500,
-                xaxis_title="Week",
-                yaxis_title="Points",
-                hovermode='x unified',
-                plot_bgcolor='white',
-                legend_title="Team"
-            )
-            
-            st.plotly_chart(fig, use_container_width=True)
         
         # Detailed data table
         st.subheader("📋 Detailed Data Table")
         
-        # Create pivot table
-        pivot_df = weekly_df.pivot_table(
-            index='team',
-            columns='week',
-            values='points',
-            aggfunc='sum'
-        )
-        
-        # Ensure correct column order
-        pivot_df = pivot_df[week_order]
-        
-        # Add row for weekly totals
-        weekly_totals_row = pivot_df.sum()
-        pivot_df.loc['📊 Week Total'] = weekly_totals_row
+        def weekly_pivot():
+            # Create pivot table
+            pivot_df = weekly_df.pivot_table(
+                index='team',
+                columns='week',
+                values='points',
+                aggfunc='sum'
+            )
+            
+            # Ensure correct column order
+            pivot_df = pivot_df[week_order]
+            
+            # Add row for weekly totals
+            weekly_totals_row = pivot_df.sum()
+            pivot_df.loc['📊 Week Total'] = weekly_totals_row
+            
+            # Add column for team totals
+            pivot_df['📈 Team Total'] = pivot_df[week_order].sum(axis=1)
+            return pivot_df
         
-        # Add column for team totals
-        pivot_df['📈 Team Total'] = pivot_df[week_order].sum(axis=1)
+        pivot_df = render_cache.get('weekly_pivot', weekly.version, weekly_pivot)
         
-        # Display with better formatting
+        # Display with better formatting; Streamlit computes the Styler when it draws
         st.dataframe(
             pivot_df.style.format("{:.0f}").background_gradient(
                 subset=week_order, 
@@ -392,7 +456,7 @@ with tab2:
         )
         
         # Export option
-        csv = weekly_df.to_csv(index=False)
+        csv = render_cache.get('weekly_csv', weekly.version, lambda: weekly_df.to_csv(index=False))
         st.download_button(
             label="📥 Download Weekly Data (CSV)",
             data=csv,
@@ -451,12 +515,40 @@ with tab2:
         })
         
         st.dataframe(sample_data, use_container_width=True)
+    
+    # Standings over time from the local history log; never reads Google Sheets
+    st.subheader("🕒 Standings History")
+    history_spans = {"Last hour": timedelta(hours=1), "Last day": timedelta(days=1),
+                     "Last week": timedelta(days=7), "Season": None}
+    st.session_state.setdefault('history_span', "Last day")
+    span = st.radio("Period", list(history_spans), horizontal=True, key='history_span')
+    start = datetime.now() - history_spans[span] if history_spans[span] else None
+    resolution, history = get_team_history(start)
+    
+    if history.empty:
+        st.caption("No history yet: team totals are logged whenever a fetch finds them changed.")
+    else:
+        def history_chart():
+            fig = px.line(history, x='time', y='points', color='team', line_shape='hv',
+                          color_discrete_map={
+                              'الشمس': '#FF6B6B',
+                              'القمر': '#4ECDC4',
+                              'الزهرة': '#FFD166',
+                              'المشتري': '#06D6A0'
+                          })
+            fig.update_layout(height=400, xaxis_title="Time", yaxis_title="Total Points", plot_bgcolor='white')
+            return fig
+        
+        st.plotly_chart(render_cache.get('history_chart', content_hash(history), history_chart),
+                        use_container_width=True)
+        st.caption(f"{len(history):,} points, {resolution} resolution")
 
-# ========== TAB 3: STUDENT PERFORMANCE ==========
-with tab3:
+# ========== VIEW 3: STUDENT PERFORMANCE ==========
+elif view == VIEWS[2]:
     st.header("👥 Student Performance")
     
-    student_df = get_student_data()
+    snapshot = load_snapshot(DATASET_SOURCES['students'], months=())
+    student_df = get_student_data(snapshot)
     
     if not student_df.empty:
         # Clean the data - remove rows with empty or invalid team names
@@ -489,30 +581,34 @@ with tab3:
         
         with col1:
             if len(team_counts) > 0:
-                # Create pie chart with only valid teams
-                fig = px.pie(
-                    values=team_counts.values, 
-                    names=team_counts.index,
-                    color=team_counts.index,
-                    color_discrete_map={
-                        'الشمس': '#FF6B6B',
-                        'القمر': '#4ECDC4',
-                        'الزهرة': '#FFD166',
-                        'المشتري': '#06D6A0'
-                    },
-                    hole=0.3  # Creates a donut chart
-                )
-                fig.update_layout(
-                    height=400,
-                    showlegend=True,
-                    legend=dict(
-                        orientation="h",
-                        yanchor="bottom",
-                        y=-0.2,
-                        xanchor="center",
-                        x=0.5
+                def team_pie():
+                    # Create pie chart with only valid teams
+                    fig = px.pie(
+                        values=team_counts.values, 
+                        names=team_counts.index,
+                        color=team_counts.index,
+                        color_discrete_map={
+                            'الشمس': '#FF6B6B',
+                            'القمر': '#4ECDC4',
+                            'الزهرة': '#FFD166',
+                            'المشتري': '#06D6A0'
+                        },
+                        hole=0.3  # Creates a donut chart
                     )
-                )
+                    fig.update_layout(
+                        height=400,
+                        showlegend=True,
+                        legend=dict(
+                            orientation="h",
+                            yanchor="bottom",
+                            y=-0.2,
+                            xanchor="center",
+                            x=0.5
+                        )
+                    )
+                    return fig
+                
+                fig = render_cache.get('team_pie', tuple(team_counts.items()), team_pie)
                 st.plotly_chart(fig, use_container_width=True)
             else:
                 st.info("No valid team data available for chart")
@@ -535,19 +631,55 @@ with tab3:
                     st.write("These students have missing or invalid team names:")
                     st.dataframe(invalid_teams[['name', 'team']], use_container_width=True)
         
-        # Student list by team
+        # Student list: filtered, sorted and paged here, only the page is sent
         st.subheader("Student List")
+        student_table = get_student_table(snapshot)
+        
+        fcol1, fcol2, fcol3, fcol4 = st.columns(4)
+        with fcol1:
+            team_filter = st.selectbox("Filter by Team", ['All Teams'] + valid_teams)
+        with fcol2:
+            gender_filter = st.selectbox("Gender", ['All'] + student_table.options('gender'))
+        with fcol3:
+            grade_filter = st.selectbox("Grade", ['All'] + student_table.options('grade'))
+        with fcol4:
+            name_prefix = st.text_input("Name starts with", "")
+        
+        scol1, scol2, scol3 = st.columns([2, 1, 1])
+        sort_labels = {'name': 'Name', 'team': 'Team', 'gender': 'Gender', 'grade': 'Grade', 'its': 'ITS ID'}
+        with scol1:
+            sort_column = st.selectbox("Sort by", list(sort_labels), format_func=sort_labels.get)
+        with scol2:
+            descending = st.toggle("Descending", value=False)
+        with scol3:
+            page_size = st.selectbox("Rows per page", PAGE_SIZES)
+        
+        filters = dict(
+            team=None if team_filter == 'All Teams' else team_filter,
+            gender=None if gender_filter == 'All' else gender_filter,
+            grade=None if grade_filter == 'All' else grade_filter,
+            prefix=name_prefix,
+            sort=sort_column,
+            descending=descending,
+        )
+        total = len(student_table.query(**filters))
+        pages = max(1, -(-total // page_size))
         
-        team_filter = st.selectbox("Filter by Team", 
-                                 ['All Teams'] + valid_teams)
+        # A new filter starts again from the first page
+        if st.session_state.get('student_filters') != filters:
+            st.session_state.student_filters = filters
+            st.session_state.student_page = 1
+        elif st.session_state.get('student_page', 1) > pages:
+            st.session_state.student_page = pages
+        page_number = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages,
+                                      key='student_page')
         
-        if team_filter != 'All Teams':
-            display_students = filtered_students[filtered_students['team'] == team_filter]
-        else:
-            display_students = filtered_students
+        display_students, total = student_table.page(page_number, page_size, **filters)
         
         # Display student table
         if len(display_students) > 0:
+            first = (page_number - 1) * page_size + 1
+            st.caption(f"Showing {first}-{first + len(display_students) - 1} of {total} students")
             st.dataframe(
                 display_students[['name', 'team', 'gender', 'grade', 'its']].rename(columns={
                     'name': 'Name',
@@ -565,63 +697,42 @@ with tab3:
     else:
         st.warning("No student data found.")
 
-# ========== TAB 4: SPECIAL ACHIEVEMENTS ==========
-with tab4:
+# ========== VIEW 4: SPECIAL ACHIEVEMENTS ==========
+else:
     st.header("🎯 Special Achievements")
     
     # Based on your Excel file, we have monthly sheets like JAN
-    months = ['JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUN', 
-              'JUL', 'AUG', 'SEP', 'OCT', 'NOV', 'DEC']
+    months = MONTH_SHEETS
     
-    all_achievements = pd.DataFrame()
-    loaded_months = []
+    # Indexed once per data version; filters below are lookups into it
+    achievements = get_achievements_index(months)
+    loaded_months = achievements.options('month')
     
-    for month in months:
-        try:
-            achievements = get_special_achievements(month)
-            if not achievements.empty:
-                achievements['month_display'] = month
-                all_achievements = pd.concat([all_achievements, achievements], ignore_index=True)
-                loaded_months.append(month)
-        except Exception as e:
-            # Sheet doesn't exist or error - skip it
-            continue
-    
-    if not all_achievements.empty:
+    if not achievements.empty:
         st.success(f"✅ Loaded achievements from: {', '.join(loaded_months)}")
         
         # Create filters
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            # Get unique categories
-            categories = ['All'] + sorted(all_achievements['category'].dropna().unique().tolist())
+            categories = ['All'] + sorted(achievements.options('category'))
             selected_category = st.selectbox("Achievement Type", categories)
         
         with col2:
-            # Get unique teams
-            teams = ['All'] + sorted(all_achievements['team'].dropna().unique().tolist())
+            teams = ['All'] + sorted(achievements.options('team'))
             selected_team = st.selectbox("Team", teams)
         
         with col3:
-            # Get unique months
-            month_list = ['All'] + sorted(all_achievements['month_display'].unique().tolist())
+            month_list = ['All'] + sorted(loaded_months)
             selected_month = st.selectbox("Month", month_list)
         
         # Apply filters
-        filtered_df = all_achievements.copy()
-        
-        if selected_category != 'All':
-            filtered_df = filtered_df[filtered_df['category'] == selected_category]
-        
-        if selected_team != 'All':
-            filtered_df = filtered_df[filtered_df['team'] == selected_team]
-        
-        if selected_month != 'All':
-            filtered_df = filtered_df[filtered_df['month_display'] == selected_month]
-        
-        # Remove rows with empty or "-" student names
-        filtered_df = filtered_df[~filtered_df['student'].isin(['', '-', None])]
+        selection = {
+            'category': None if selected_category == 'All' else selected_category,
+            'team': None if selected_team == 'All' else selected_team,
+            'month': None if selected_month == 'All' else selected_month,
+        }
+        filtered_df = achievements.select(**selection)
         
         if not filtered_df.empty:
             # Display summary
@@ -635,37 +746,30 @@ with tab4:
             with cols[2]:
                 st.metric("Unique Students", filtered_df['student'].nunique())
             with cols[3]:
-                if not filtered_df.empty:
-                    top_team = filtered_df['team'].value_counts().index[0]
-                    st.metric("Top Team", top_team)
+                top_team = filtered_df['team'].value_counts().index[0]
+                st.metric("Top Team", top_team)
             
             # Display by category
             st.subheader("🏅 Achievements by Category")
             
-            for category in filtered_df['category'].unique():
-                cat_data = filtered_df[filtered_df['category'] == category]
-                
-                with st.expander(f"{category} ({len(cat_data)})"):
-                    if not cat_data.empty:
-                        # Group by team for display
-                        for team in cat_data['team'].unique():
-                            team_data = cat_data[cat_data['team'] == team]
-                            
-                            st.markdown(f"**{team}**")
-                            for _, row in team_data.iterrows():
-                                st.write(f"• {row['student']}: {row['points']} points")
-                            st.write("---")
+            for category, by_team in achievements.breakdown(**selection).items():
+                with st.expander(f"{category} ({sum(len(rows) for rows in by_team.values())})"):
+                    for team, team_data in by_team.items():
+                        st.markdown(f"**{team}**")
+                        for student, points in zip(team_data['student'], team_data['points']):
+                            st.write(f"• {student}: {points} points")
+                        st.write("---")
             
             # Data table view
             with st.expander("📋 View as Data Table"):
                 st.dataframe(
-                    filtered_df[['student', 'team', 'category', 'points', 'month_display']].rename(
+                    filtered_df[['student', 'team', 'category', 'points', 'month']].rename(
                         columns={
                             'student': 'Student',
                             'team': 'Team',
                             'category': 'Achievement Type',
                             'points': 'Points',
-                            'month_display': 'Month'
+                            'month': 'Month'
                         }
                     ),
                     use_container_width=True,
@@ -712,6 +816,35 @@ with tab4:
         3. The sheet has the achievement categories in the right format
         """)
 
+# ========== PREFETCH ==========
+# The selected view is drawn; warm the others in the background
+for name, (dataset, loader) in PREFETCH.items():
+    if name != view:
+        prefetch(dataset, loader)
+
+# ========== RERUN METRICS ==========
+with metrics_slot.container():
+    hit_ratio = rerun_metrics.cache_hit_ratio()
+    st.caption(f"Sheets API calls this rerun: {rerun_metrics.api_calls()}")
+    st.caption("Cache hit ratio: " + (f"{hit_ratio:.0%}" if hit_ratio is not None else "n/a"))
+    with st.expander("⏱️ Loader metrics"):
+        st.dataframe(pd.DataFrame(rerun_metrics.summary()), use_container_width=True, hide_index=True)
+        process_ratio = metrics.cache_hit_ratio()
+        st.caption(
+            f"Since start: {metrics.api_calls()} API calls, cache hit ratio "
+            + (f"{process_ratio:.0%}" if process_ratio is not None else "n/a")
+        )
+        st.caption(
+            f"Read queue: {metrics.gauges.get('read_queue_depth', 0)} waiting, "
+            f"{metrics.gauges.get('read_tokens', '-')} tokens left | "
+            f"deferred {metrics.total('deferred')}, throttled {metrics.total('throttled')}"
+        )
+    unreadable = list(bad_cells.items())
+    if unreadable:
+        with st.expander(f"⚠️ Unreadable cells ({sum(len(cells) for _, cells in unreadable)})"):
+            for dataset, cells in unreadable:
+                st.caption(f"{dataset}: " + ", ".join(f"{cell} = {value!r}" for cell, value in cells[:10]))
+
 # ========== FOOTER ==========
 st.markdown("---")
 st.markdown(f"""
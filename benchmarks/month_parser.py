@@ -0,0 +1,97 @@
+"""Month sheet parsing: the old row loop vs. shared.achievements
+
+Builds synthetic month sheets with the JAN layout, checks that
+parse_month_sheet returns exactly what the old row loop returned, and
+times both.
+
+    python benchmarks/month_parser.py --rows 100000
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.achievements import MONTH_SECTIONS, TEAM_COLUMNS, parse_month_sheet
+from shared.sheets_standin import synthetic_fixture
+
+SECTION_COUNT = len(MONTH_SECTIONS)
+
+
+def row_loop_parse(all_data, month_sheet):
+    """The parser get_special_achievements used before, for reference"""
+    achievements = []
+    current_category = ""
+    i = 0
+    while i < len(all_data):
+        row = all_data[i]
+        if not any(row):
+            i += 1
+            continue
+        row_text = " ".join(str(cell) for cell in row)
+        header = next((phrase for phrase in MONTH_SECTIONS if phrase in row_text), None)
+        if header is not None:
+            current_category = MONTH_SECTIONS[header]
+            i += 2
+            continue
+        elif "Total points" in row_text:
+            break
+        for col_idx, team_name in TEAM_COLUMNS.items():
+            if col_idx < len(row):
+                student = str(row[col_idx]).strip()
+                points_cell = str(row[col_idx + 1]).strip() if col_idx + 1 < len(row) else ""
+                if student and student != "-":
+                    points = 0
+                    points_str = "".join(ch for ch in points_cell if ch.isdigit() or ch == '.')
+                    if points_str:
+                        points = float(points_str)
+                    achievements.append({
+                        'student': student,
+                        'points': points,
+                        'category': current_category,
+                        'team': team_name,
+                        'month': month_sheet
+                    })
+        i += 1
+    return pd.DataFrame(achievements)
+
+
+def month_rows(rows, typed, seed=0):
+    fixture = synthetic_fixture(rows_per_section=max(1, rows // SECTION_COUNT - 3), seed=seed)
+    sheet = fixture["unformatted" if typed else "sheets"]["JAN"]
+    # Title rows above the first header, blanks and dashes, as the real sheet has
+    return [["JANUARY 2024"], [], ["-", "", "Student 1", "-"]] + sheet + [["Notes after the total"]]
+
+
+def timed(parse, rows, repeat=1):
+    """Result and best time of ``repeat`` runs"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = parse(rows, "JAN")
+        best = min(best, time.perf_counter() - started)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", default="100,1000,10000,100000")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per timing, the best is shown")
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'typed':>6} {'old loop':>10} {'parse_month_sheet':>18} {'speedup':>8}")
+    for size in map(int, args.rows.split(",")):
+        for typed in (False, True):
+            rows = month_rows(size, typed)
+            expected, loop_seconds = timed(row_loop_parse, rows, args.repeat)
+            result, seconds = timed(parse_month_sheet, rows, args.repeat)
+            pd.testing.assert_frame_equal(result, expected)
+            print(f"{len(rows):>8} {str(typed):>6} {loop_seconds * 1000:>8.1f}ms "
+                  f"{seconds * 1000:>16.1f}ms {loop_seconds / seconds:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
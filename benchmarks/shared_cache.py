@@ -0,0 +1,64 @@
+"""Upstream reads vs. number of reader processes sharing one host
+
+Starts the Sheets stand-in, then runs 1, 2, 4 and 8 reader processes
+that each ask for the scoreboard snapshot every few milliseconds with a
+short TTL. With the shared store every refresh interval costs one
+batchGet no matter how many readers there are.
+
+    python benchmarks/shared_cache.py --seconds 6 --ttl 1
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.sheets_standin import SheetsStandIn, synthetic_fixture
+
+
+def reader(seconds, ttl):
+    from shared import data_loader
+
+    for key in data_loader.DATASET_TTLS:
+        data_loader.DATASET_TTLS[key] = ttl
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        data_loader.get_team_data(data_loader.get_snapshot(months=()))
+        time.sleep(0.01)
+
+
+def run(readers, seconds, ttl, latency):
+    standin = SheetsStandIn(synthetic_fixture(), latency=latency)
+    server, url = standin.start()
+    with tempfile.TemporaryDirectory() as store_dir:
+        os.environ["SHEETS_API_URL"] = url
+        os.environ["SCOREBOARD_STORE_PATH"] = os.path.join(store_dir, "snapshots.sqlite3")
+        context = multiprocessing.get_context("spawn")
+        processes = [context.Process(target=reader, args=(seconds, ttl)) for _ in range(readers)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+    server.shutdown()
+    return standin.stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=6)
+    parser.add_argument("--ttl", type=float, default=1)
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--readers", default="1,2,4,8")
+    args = parser.parse_args()
+
+    print(f"{'readers':>8} {'batchGet':>9} {'metadata':>9}   (TTL {args.ttl}s for {args.seconds}s)")
+    for readers in map(int, args.readers.split(",")):
+        stats = run(readers, args.seconds, args.ttl, args.latency)
+        print(f"{readers:>8} {stats['batchGet']:>9} {stats['metadata']:>9}")
+
+
+if __name__ == "__main__":
+    main()
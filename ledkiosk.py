@@ -11,104 +11,14 @@ if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 
 import streamlit as st
-import pandas as pd
 
-# Import from shared module
-from shared.data_loader import get_team_data, get_student_data
+# Import from shared module (cached, refreshed in the background)
+from shared.cell_values import format_points
+from shared.data_loader import get_top_students, load_dataset, load_snapshot
+from shared.envelope import diff
+from shared.refresher import start_refresher
 # ========== END IMPORTS ==========
 
-# ========== GOOGLE SHEETS CONNECTION ==========
-SCOPES = ['https://www.googleapis.com/auth/spreadsheets']
-SPREADSHEET_ID = '12FWohzX2yJXxvC4xTu3-NSTzLgJogQOmp2LtDLDaw7I'
-
-@st.cache_resource(show_spinner=False)
-def get_google_sheet():
-    """Connect to Google Sheets - Silent"""
-    credentials = Credentials.from_service_account_info(
-        st.secrets["gcp_service_account"],
-        scopes=SCOPES
-    )
-    return gspread.authorize(credentials).open_by_key(SPREADSHEET_ID)
-
-@st.cache_data(ttl=60, show_spinner=False)
-def get_team_data():
-    """Get team leaderboard data - Silent"""
-    try:
-        sheet = get_google_sheet()
-        ws = sheet.worksheet("OFFICE WORKING")
-        
-        team_positions = [
-            ('الشمس', 48),
-            ('القمر', 49),
-            ('الزهرة', 50),
-            ('المشتري', 51)
-        ]
-        
-        teams = []
-        
-        for team_name, row_num in team_positions:
-            try:
-                points_cell = ws.acell(f'D{row_num}', value_render_option='FORMATTED_VALUE').value
-                
-                if points_cell:
-                    try:
-                        cleaned = str(points_cell).replace(',', '').strip()
-                        points = float(cleaned) if cleaned else 0
-                    except:
-                        points = 0
-                else:
-                    points = 0
-                
-                teams.append({
-                    'team': team_name,
-                    'points': points
-                })
-                
-            except Exception:
-                teams.append({
-                    'team': team_name,
-                    'points': 0
-                })
-        
-        df = pd.DataFrame(teams)
-        df = df.sort_values('points', ascending=False)
-        df['rank'] = range(1, len(df) + 1)
-        return df
-        
-    except Exception:
-        return pd.DataFrame({
-            'team': ['الشمس', 'القمر', 'الزهرة', 'المشتري'],
-            'points': [67, 58, 45, 50],
-            'rank': [1, 2, 3, 4]
-        })
-
-@st.cache_data(ttl=180, show_spinner=False)
-def get_student_data():
-    """Get individual student performance - Silent"""
-    try:
-        sheet = get_google_sheet()
-        ws = sheet.worksheet("OFFICE WORKING")
-        
-        data = ws.get_values('A4:H43')
-        students = []
-        for row in data:
-            if len(row) >= 8:
-                students.append({
-                    'id': row[0] if row[0] else '',
-                    'group': row[1] if len(row) > 1 else '',
-                    'team': row[2] if len(row) > 2 else '',
-                    'name': row[3] if len(row) > 3 else '',
-                    'its': row[4] if len(row) > 4 else '',
-                    'grade': row[5] if len(row) > 5 else '',
-                    'gender': row[6] if len(row) > 6 else '',
-                    'eq_id': row[7] if len(row) > 7 else ''
-                })
-        return pd.DataFrame(students)
-        
-    except Exception:
-        return pd.DataFrame()
-# ========== END GOOGLE SHEETS CODE ==========
-
 # ========== LED/KIOSK MODE ==========
 st.set_page_config(
     page_title="Quran LED Scoreboard",
@@ -116,6 +26,9 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
+# Keep the scoreboard snapshot hot so renders never wait on Google Sheets
+start_refresher()
+
 # COMPLETE UI HIDING
 hide_streamlit_style = """
 <style>
@@ -258,6 +171,20 @@ led_css = """
         box-shadow: 0 0 15px #FFD700 !important;
     }
     
+    /* A rank that changed with the latest data, for RANK_MOVE_SECONDS */
+    .led-team-card.moved {
+        animation: led-moved 1.2s ease-in-out 3;
+    }
+    
+    @keyframes led-moved {
+        50% { transform: scale(1.06); box-shadow: 0 0 30px currentColor; }
+    }
+    
+    .led-rank-move {
+        font-size: 1.8rem !important;
+        font-weight: 900 !important;
+    }
+    
     .timestamp {
         text-align: center !important;
         margin-top: 20px !important;
@@ -279,19 +206,35 @@ TEAM_CONFIG = {
 }
 
 # ========== SLIDE MANAGEMENT ==========
-# Get current slide from URL or default to 0
-query_params = st.query_params
-current_slide = 0
+SLIDE_SECONDS = 10
+
+# How long a rank change stays marked on the team cards
+RANK_MOVE_SECONDS = 300
 
-# Check if we have a slide parameter in URL
-if 'slide' in query_params:
+# Starting slide from URL or default to 0; after that the session rotates it
+if 'slide' not in st.session_state:
     try:
-        current_slide = int(query_params['slide'])
-    except:
-        current_slide = 0
+        st.session_state.slide = int(st.query_params.get('slide', 0))
+    except ValueError:
+        st.session_state.slide = 0
 
-# Calculate next slide
-next_slide = 1 if current_slide == 0 else 0
+def team_moves(teams):
+    """``{team: (old_rank, new_rank)}`` of the latest data change, while recent"""
+    previous = st.session_state.get('teams_envelope')
+    if previous is None or previous.version != teams.version:
+        if previous is not None:
+            st.session_state.team_moves = (diff(previous, teams).moved(), time.time())
+        st.session_state.teams_envelope = teams
+    moves, since = st.session_state.get('team_moves', ({}, 0))
+    return moves if time.time() - since < RANK_MOVE_SECONDS else {}
+
+
+def show_timestamp(fetched_at):
+    """When the numbers on screen were read from the sheet, and how long ago"""
+    minutes = int((datetime.now() - fetched_at).total_seconds() // 60)
+    age = "الآن" if minutes < 1 else f"منذ {minutes} دقيقة"
+    st.markdown(f'<div class="timestamp">آخر تحديث: {fetched_at.strftime("%I:%M %p")} · {age}</div>',
+                unsafe_allow_html=True)
 
 # ========== SLIDE 0: TEAM COMPARISON ==========
 def show_slide_comparison():
@@ -300,8 +243,10 @@ def show_slide_comparison():
     st.markdown('<h1 class="led-title">📊 مقارنة الفرق</h1>', unsafe_allow_html=True)
     st.markdown('<h2 class="led-subtitle">TEAM COMPARISON</h2>', unsafe_allow_html=True)
     
-    # Get team data
-    team_df = get_team_data()
+    # Get team data, with the rank changes of its latest version
+    teams = load_dataset('teams')
+    team_df = teams.data
+    moves = team_moves(teams)
     
     if not team_df.empty:
         cols = st.columns(4)
@@ -309,15 +254,22 @@ def show_slide_comparison():
         for idx, (_, team) in enumerate(team_df.iterrows()):
             with cols[idx]:
                 config = TEAM_CONFIG.get(team['team'], TEAM_CONFIG['الشمس'])
+                move = ""
+                if team['team'] in moves:
+                    old_rank, new_rank = moves[team['team']]
+                    arrow, color = ("▲", "#00FF7F") if new_rank < old_rank else ("▼", "#FF4040")
+                    move = (f'<div class="led-rank-move" style="color: {color} !important;">'
+                            f'{arrow} {abs(old_rank - new_rank)}</div>')
                 
                 st.markdown(f"""
-                <div class="led-team-card" style="border-color: {config['border']} !important;">
+                <div class="led-team-card{' moved' if move else ''}" style="border-color: {config['border']} !important;">
                     <div class="led-team-rank">#{team['rank']}</div>
+                    {move}
                     <div class="led-team-name" style="color: {config['color']} !important;">
                         {config['icon']} {team['team']}
                     </div>
                     <div class="led-team-points" style="color: {config['color']} !important;">
-                        {team['points']:,.0f}
+                        {format_points(team['points'])}
                     </div>
                     <div style="font-size: 1.8rem !important; color: #AAA !important;">
                         POINTS
@@ -325,9 +277,7 @@ def show_slide_comparison():
                 </div>
                 """, unsafe_allow_html=True)
     
-    # Timestamp
-    current_time = datetime.now().strftime("%I:%M %p")
-    st.markdown(f'<div class="timestamp">آخر تحديث: {current_time}</div>', unsafe_allow_html=True)
+    show_timestamp(teams.fetched_at)
 
 # ========== SLIDE 1: TOP STUDENTS ==========
 def show_slide_students():
@@ -336,66 +286,53 @@ def show_slide_students():
     st.markdown('<h1 class="led-title">👑 أعلى ٥ طلاب</h1>', unsafe_allow_html=True)
     st.markdown('<h2 class="led-subtitle">TOP 5 STUDENTS</h2>', unsafe_allow_html=True)
     
-    # Get student data
-    student_df = get_student_data()
+    # Leaders by achievement points, kept up to date between slides
+    top_students = get_top_students(5)
     
-    if not student_df.empty:
-        valid_teams = ['الشمس', 'القمر', 'الزهرة', 'المشتري']
-        filtered_students = student_df[student_df['team'].isin(valid_teams)].copy()
+    for i in range(len(top_students)):
+        student = top_students.iloc[i]
+        config = TEAM_CONFIG.get(student['team'], TEAM_CONFIG['الشمس'])
         
-        if len(filtered_students) > 0:
-            for i in range(min(5, len(filtered_students))):
-                student = filtered_students.iloc[i]
-                config = TEAM_CONFIG.get(student['team'], TEAM_CONFIG['الشمس'])
-                
-                student_name = student['name']
-                if len(student_name) > 25:
-                    student_name = student_name[:22] + "..."
-                
-                st.markdown(f"""
-                <div class="led-student-card" style="border-left-color: {config['color']} !important;">
-                    <div style="display: flex; align-items: center;">
-                        <span style="font-size: 2.5rem !important; color: {config['color']} !important; margin-right: 15px !important;">
-                            #{i+1}
-                        </span>
-                        <strong style="font-size: 2.5rem !important;">{student_name}</strong>
-                    </div>
-                    <div style="color: {config['color']} !important; font-size: 2rem !important;">
-                        {config['icon']} {student['team']}
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
+        student_name = student['name']
+        if len(student_name) > 25:
+            student_name = student_name[:22] + "..."
+        
+        st.markdown(f"""
+        <div class="led-student-card" style="border-left-color: {config['color']} !important;">
+            <div style="display: flex; align-items: center;">
+                <span style="font-size: 2.5rem !important; color: {config['color']} !important; margin-right: 15px !important;">
+                    #{student['rank']}
+                </span>
+                <strong style="font-size: 2.5rem !important;">{student_name}</strong>
+            </div>
+            <div style="color: {config['color']} !important; font-size: 2rem !important;">
+                {student['points']:,.0f} · {config['icon']} {student['team']}
+            </div>
+        </div>
+        """, unsafe_allow_html=True)
     
-    # Timestamp
-    current_time = datetime.now().strftime("%I:%M %p")
-    st.markdown(f'<div class="timestamp">آخر تحديث: {current_time}</div>', unsafe_allow_html=True)
+    show_timestamp(load_snapshot(['students'], months=()).fetched_at_of(['students']))
 
 # ========== MAIN DISPLAY ==========
-# Show current slide
 slides = [show_slide_comparison, show_slide_students]
-slides[current_slide]()
 
-# Slide indicator
-dots_html = '<div class="slide-indicator">'
-for i in range(2):
-    active_class = "active" if i == current_slide else ""
-    dots_html += f'<span class="slide-dot {active_class}"></span>'
-dots_html += '</div>'
-st.markdown(dots_html, unsafe_allow_html=True)
 
-# ========== AUTO-REFRESH WITH SLIDE ROTATION ==========
-# JavaScript to auto-refresh and switch slides
-auto_refresh_js = f"""
-<script>
-    // Wait 10 seconds, then redirect to next slide
-    setTimeout(function() {{
-        // Redirect to next slide
-        window.location.href = window.location.pathname + "?slide={next_slide}";
-    }}, 10000); // 10 seconds
-</script>
-"""
-
-
-st.markdown(auto_refresh_js, unsafe_allow_html=True)
+# Only this fragment reruns every SLIDE_SECONDS: same page, same websocket,
+# the CSS above is sent once per session instead of once per slide
+@st.fragment(run_every=SLIDE_SECONDS)
+def show_slideshow():
+    current_slide = st.session_state.slide % len(slides)
+    slides[current_slide]()
+    
+    # Slide indicator
+    dots_html = '<div class="slide-indicator">'
+    for i in range(len(slides)):
+        active_class = "active" if i == current_slide else ""
+        dots_html += f'<span class="slide-dot {active_class}"></span>'
+    dots_html += '</div>'
+    st.markdown(dots_html, unsafe_allow_html=True)
+    
+    st.session_state.slide = current_slide + 1
 
 
+show_slideshow()
@@ -0,0 +1,344 @@
+# ========== IMPORTS FIRST ==========
+import argparse
+import gzip
+import hashlib
+import json
+import math
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# For Streamlit Cloud environment
+PROJECT_ROOT = "/mount/src/mukhayum-scoreboard"
+
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from shared.data_loader import get_snapshot, get_top_students, load_dataset
+from shared.envelope import diff
+from shared.refresher import start_refresher
+# ========== END IMPORTS ==========
+
+# Lightweight LED wall: one static page plus a JSON snapshot pushed over
+# server-sent events, instead of a Streamlit session per screen.
+#
+#   python ledserver.py --port 8502
+
+POLL_SECONDS = 5
+KEEPALIVE_SECONDS = 15
+
+# How long a rank change stays marked on the team cards
+RANK_MOVE_SECONDS = 300
+
+# Team colors, same as ledkiosk.py
+TEAM_CONFIG = {
+    'الشمس': {'color': '#FF6B00', 'border': '#FF0000', 'icon': '☀️'},
+    'القمر': {'color': '#00B4D8', 'border': '#00FFFF', 'icon': '🌙'},
+    'الزهرة': {'color': '#FF4081', 'border': '#FF00FF', 'icon': '⭐'},
+    'المشتري': {'color': '#7B2CBF', 'border': '#9D4EDD', 'icon': '🪐'}
+}
+
+
+# ========== STANDINGS ==========
+class Standings:
+    """Latest scoreboard payload, pre-encoded, plus a change signal
+
+    The JSON body and its gzip form are built once per change, so every
+    screen polling or listening costs a dictionary lookup.
+    """
+
+    def __init__(self):
+        self.version = None
+        self.fetched_at = None
+        self.body = b'{}'
+        self.body_gzip = gzip.compress(self.body)
+        self._changed = threading.Condition()
+
+    def update(self, payload):
+        """Publish ``payload``; returns whether the standings changed"""
+        # Fetch time is left out so a re-read of unchanged data is not a change;
+        # screens learn it from the 'fresh' events instead
+        self.fetched_at = payload.get('fetched_at')
+        standings_only = {k: v for k, v in payload.items() if k != 'fetched_at'}
+        version = hashlib.blake2b(
+            json.dumps(standings_only, ensure_ascii=False, sort_keys=True).encode('utf-8'),
+            digest_size=8
+        ).hexdigest()
+        if version == self.version:
+            return False
+        body = json.dumps(dict(payload, version=version), ensure_ascii=False,
+                          separators=(',', ':')).encode('utf-8')
+        with self._changed:
+            self.version = version
+            self.body = body
+            self.body_gzip = gzip.compress(body)
+            self._changed.notify_all()
+        return True
+
+    def wait_for_change(self, version, timeout):
+        """Block until the version differs from ``version`` or timeout"""
+        with self._changed:
+            self._changed.wait_for(lambda: self.version != version, timeout)
+            return self.version, self.body
+
+
+# Teams envelope last shown, and the rank moves of its latest change with their time
+_team_moves = (None, {}, 0.0)
+
+
+def team_moves(teams):
+    """``{team: (old_rank, new_rank)}`` of the latest data change, while recent"""
+    global _team_moves
+    previous, moves, since = _team_moves
+    if previous is None or previous.version != teams.version:
+        if previous is not None:
+            moves, since = diff(previous, teams).moved(), time.time()
+        _team_moves = (teams, moves, since)
+    return moves if time.time() - since < RANK_MOVE_SECONDS else {}
+
+
+def build_payload():
+    """Team cards and student rows the LED wall shows"""
+    snapshot = get_snapshot(['teams', 'students'], months=())
+    team_data = load_dataset('teams', snapshot)
+    moves = team_moves(team_data)
+    top_students = get_top_students(5)
+
+    teams = [
+        # An unreadable total (NaN) goes out as null, JSON has no NaN
+        {'team': row['team'], 'points': None if math.isnan(row['points']) else float(row['points']),
+         'rank': int(row['rank']),
+         # Places gained (positive) or lost in the latest change
+         'moved': moves[row['team']][0] - moves[row['team']][1] if row['team'] in moves else 0}
+        for _, row in team_data.data.iterrows()
+    ]
+    students = [
+        {'name': row['name'], 'team': row['team'], 'points': float(row['points']), 'rank': int(row['rank'])}
+        for _, row in top_students.iterrows()
+    ]
+    return {
+        'teams': teams,
+        'students': students,
+        'fetched_at': team_data.fetched_at.isoformat(timespec='seconds'),
+    }
+
+
+def poll_standings(standings, interval=POLL_SECONDS):
+    """Rebuild the payload from the shared loader and publish changes"""
+    while True:
+        try:
+            standings.update(build_payload())
+        except Exception as e:
+            print(f"Error building LED payload: {e}")
+        time.sleep(interval)
+
+
+# ========== PAGE ==========
+PAGE = """<!DOCTYPE html>
+<html lang="ar">
+<head>
+<meta charset="utf-8">
+<title>Quran LED Scoreboard</title>
+<style>
+  html, body { margin: 0; background: #000; color: #fff; font-family: sans-serif; overflow: hidden; }
+  .led-title { font-size: 4.5rem; font-weight: 900; text-align: center; color: #FFD700;
+               text-shadow: 0 0 15px #FFD700; margin: 0.5rem 0 0; }
+  .led-subtitle { font-size: 2.2rem; font-weight: 700; text-align: center; color: #00FFFF;
+                  text-shadow: 0 0 10px #00FFFF; margin: 0 0 1.5rem; }
+  .teams { display: flex; gap: 10px; padding: 0 10px; }
+  .led-team-card { flex: 1; background: rgba(10,10,10,0.95); border-radius: 20px; padding: 15px;
+                   border: 4px solid; text-align: center; min-height: 250px; display: flex;
+                   flex-direction: column; justify-content: center; }
+  .led-team-rank { font-size: 2.8rem; background: linear-gradient(135deg, #FFD700 0%, #FFA500 100%);
+                   color: #000; border-radius: 50%; width: 80px; height: 80px; display: flex;
+                   align-items: center; justify-content: center; margin: 0 auto 10px; font-weight: 900; }
+  .led-team-name { font-size: 3.2rem; font-weight: 900; margin: 8px 0; direction: rtl; }
+  .led-team-points { font-size: 4.5rem; font-weight: 900; margin: 12px 0; text-shadow: 0 0 10px; }
+  .led-student-card { background: rgba(20,20,20,0.9); padding: 20px; margin: 8px 10px; border-radius: 15px;
+                      border-left: 8px solid; font-size: 2.2rem; display: flex;
+                      justify-content: space-between; align-items: center; }
+  .slide { display: none; }
+  .slide.active { display: block; }
+  .slide-indicator { text-align: center; margin-top: 15px; padding: 8px; }
+  .slide-dot { display: inline-block; width: 20px; height: 20px; border-radius: 50%; margin: 0 10px; background: #444; }
+  .slide-dot.active { background: #FFD700; box-shadow: 0 0 15px #FFD700; }
+  .led-team-card.moved { animation: led-moved 1.2s ease-in-out 3; }
+  @keyframes led-moved { 50% { transform: scale(1.06); box-shadow: 0 0 30px currentColor; } }
+  .led-rank-move { font-size: 1.8rem; font-weight: 900; }
+  .timestamp { text-align: center; margin-top: 20px; color: #666; font-size: 1.5rem; font-family: monospace; }
+</style>
+</head>
+<body>
+<div class="slide active">
+  <h1 class="led-title">📊 مقارنة الفرق</h1>
+  <h2 class="led-subtitle">TEAM COMPARISON</h2>
+  <div class="teams" id="teams"></div>
+</div>
+<div class="slide">
+  <h1 class="led-title">👑 أعلى ٥ طلاب</h1>
+  <h2 class="led-subtitle">TOP 5 STUDENTS</h2>
+  <div id="students"></div>
+</div>
+<div class="slide-indicator"><span class="slide-dot active"></span><span class="slide-dot"></span></div>
+<div class="timestamp" id="timestamp"></div>
+<script>
+const TEAM_CONFIG = __TEAM_CONFIG__;
+const SLIDE_SECONDS = 10;
+const fallback = TEAM_CONFIG['الشمس'];
+
+function escapeHtml(text) {
+  const div = document.createElement('div');
+  div.textContent = text;
+  return div.innerHTML;
+}
+
+function render(data) {
+  document.getElementById('teams').innerHTML = data.teams.map(team => {
+    const c = TEAM_CONFIG[team.team] || fallback;
+    const move = team.moved ? `<div class="led-rank-move" style="color: ${team.moved > 0 ? '#00FF7F' : '#FF4040'}">
+      ${team.moved > 0 ? '▲' : '▼'} ${Math.abs(team.moved)}</div>` : '';
+    return `<div class="led-team-card${team.moved ? ' moved' : ''}" style="border-color: ${c.border}">
+      <div class="led-team-rank">#${team.rank}</div>${move}
+      <div class="led-team-name" style="color: ${c.color}">${c.icon} ${escapeHtml(team.team)}</div>
+      <div class="led-team-points" style="color: ${c.color}">${team.points === null ? '–' : Math.round(team.points).toLocaleString('en-US')}</div>
+      <div style="font-size: 1.8rem; color: #AAA">POINTS</div></div>`;
+  }).join('');
+  document.getElementById('students').innerHTML = data.students.map((student, i) => {
+    const c = TEAM_CONFIG[student.team] || fallback;
+    const name = student.name.length > 25 ? student.name.slice(0, 22) + '...' : student.name;
+    return `<div class="led-student-card" style="border-left-color: ${c.color}">
+      <div><span style="font-size: 2.5rem; color: ${c.color}; margin-right: 15px">#${student.rank}</span>
+      <strong style="font-size: 2.5rem">${escapeHtml(name)}</strong></div>
+      <div style="color: ${c.color}; font-size: 2rem">${Math.round(student.points).toLocaleString('en-US')} · ${c.icon} ${escapeHtml(student.team)}</div></div>`;
+  }).join('');
+  showAge(data.fetched_at);
+}
+
+// Data age, not render time: when the numbers were read from the sheet
+let fetchedAt = null;
+function showAge(fetched_at) {
+  if (fetched_at) fetchedAt = new Date(fetched_at);
+  if (!fetchedAt) return;
+  const minutes = Math.floor((Date.now() - fetchedAt) / 60000);
+  document.getElementById('timestamp').textContent =
+    'آخر تحديث: ' + fetchedAt.toLocaleTimeString('en-US', {hour: '2-digit', minute: '2-digit'}) +
+    ' · ' + (minutes < 1 ? 'الآن' : `منذ ${minutes} دقيقة`);
+}
+setInterval(() => showAge(null), 30000);
+
+fetch('snapshot.json').then(r => r.json()).then(render);
+const events = new EventSource('events');
+events.addEventListener('snapshot', e => render(JSON.parse(e.data)));
+events.addEventListener('fresh', e => showAge(JSON.parse(e.data).fetched_at));
+
+let current = 0;
+setInterval(() => {
+  const slides = document.querySelectorAll('.slide');
+  const dots = document.querySelectorAll('.slide-dot');
+  slides[current].classList.remove('active');
+  dots[current].classList.remove('active');
+  current = (current + 1) % slides.length;
+  slides[current].classList.add('active');
+  dots[current].classList.add('active');
+}, SLIDE_SECONDS * 1000);
+</script>
+</body>
+</html>
+""".replace('__TEAM_CONFIG__', json.dumps(TEAM_CONFIG, ensure_ascii=False))
+
+PAGE_BYTES = PAGE.encode('utf-8')
+PAGE_GZIP = gzip.compress(PAGE_BYTES)
+PAGE_ETAG = '"' + hashlib.blake2b(PAGE_BYTES, digest_size=8).hexdigest() + '"'
+
+
+# ========== HTTP SERVER ==========
+def make_handler(standings):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def send_cached(self, body, body_gzip, etag, content_type, max_age=0):
+            """Body with ETag/304 and gzip when the client accepts it"""
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.end_headers()
+                return
+            use_gzip = 'gzip' in self.headers.get('Accept-Encoding', '')
+            data = body_gzip if use_gzip else body
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(data)))
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', f'no-cache, max-age={max_age}')
+            self.send_header('Vary', 'Accept-Encoding')
+            if use_gzip:
+                self.send_header('Content-Encoding', 'gzip')
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            path = self.path.split('?', 1)[0]
+            if path in ('/', '/index.html'):
+                self.send_cached(PAGE_BYTES, PAGE_GZIP, PAGE_ETAG, 'text/html; charset=utf-8')
+            elif path == '/snapshot.json':
+                # Read body and version together so the ETag matches the body
+                with standings._changed:
+                    body, body_gzip, version = standings.body, standings.body_gzip, standings.version
+                self.send_cached(body, body_gzip, f'"{version}"', 'application/json; charset=utf-8')
+            elif path == '/events':
+                self.stream_events()
+            else:
+                self.send_error(404)
+
+        def stream_events(self):
+            """Server-sent events: one 'snapshot' event per standings change"""
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('X-Accel-Buffering', 'no')
+            self.end_headers()
+            version = self.headers.get('Last-Event-ID')
+            try:
+                while True:
+                    new_version, body = standings.wait_for_change(version, KEEPALIVE_SECONDS)
+                    if new_version != version:
+                        version = new_version
+                        self.wfile.write(f'id: {version}\nevent: snapshot\ndata: '.encode('utf-8')
+                                         + body + b'\n\n')
+                    else:
+                        # Unchanged standings: the keepalive carries the latest fetch time
+                        fresh = json.dumps({'fetched_at': standings.fetched_at})
+                        self.wfile.write(f'event: fresh\ndata: {fresh}\n\n'.encode('utf-8'))
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lightweight LED scoreboard server")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8502)
+    parser.add_argument('--poll', type=float, default=POLL_SECONDS,
+                        help="seconds between checks for new standings")
+    args = parser.parse_args()
+
+    start_refresher()
+    standings = Standings()
+    try:
+        standings.update(build_payload())
+    except Exception as e:
+        print(f"Error building LED payload: {e}")
+    threading.Thread(target=poll_standings, args=(standings, args.poll), daemon=True).start()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(standings))
+    server.daemon_threads = True
+    print(f"LED scoreboard on http://{args.host}:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from shared.cell_values import decode_numbers
+from shared.layout import TEAMS
+
+# Section headers of a month sheet, in the order they take precedence within a row
+MONTH_SECTIONS = {
+    "Nihāʾī Ikhtibār": "Final Exam (Nihāʾī Ikhtibār)",
+    "Sub Sanawāt Ikhtibār": "Sub-Sanawat Exam (Sub Sanawāt Ikhtibār)",
+    "Marhala Ikhtibār": "Stage Exam (Marhala Ikhtibār)",
+    "Monthly Jadīd Target Achievers": "Monthly Target Achievers (Monthly Jadīd)",
+    "Student of the Week Achievers": "Student of the Week (SOTW)",
+    "Other Activities": "Other Activities",
+}
+END_MARKER = "Total points"  # Row that ends the achievements
+
+# (student, points) column pairs, one per team: SUN, MOON, VENUS, JUPITER
+TEAM_COLUMNS = {2 * n: team for n, team in enumerate(TEAMS)}
+
+_HEADER = re.compile("|".join(map(re.escape, list(MONTH_SECTIONS) + [END_MARKER])))
+_PRECEDENCE = {phrase: n for n, phrase in enumerate(list(MONTH_SECTIONS) + [END_MARKER])}
+_CELL_BREAK = "\x1f"
+
+
+def iter_records(rows):
+    """Yield ``(category, student, points, team, row, col)`` per entry, in sheet order
+
+    One header matcher runs over each row's cells joined; headers sit
+    in a single cell. Rows above the first header have an empty
+    category, the row below every header (column titles) is skipped and
+    points are the cells as read.
+    """
+    category, skip = "", False
+    for row_number, row in enumerate(rows):
+        if skip:
+            skip = False  # Column titles under a header
+            continue
+        if not any(row):
+            continue
+        phrases = _HEADER.findall(_CELL_BREAK.join(map(str, row)))
+        if phrases:
+            phrase = min(phrases, key=_PRECEDENCE.get)
+            if phrase == END_MARKER:
+                return
+            category, skip = MONTH_SECTIONS[phrase], True
+            continue
+        for col, team in TEAM_COLUMNS.items():
+            if col < len(row):
+                student = str(row[col]).strip()
+                if student and student != '-':
+                    points = row[col + 1] if col + 1 < len(row) else ''
+                    yield category, student, points, team, row_number, col + 1
+
+
+def parse_month_sheet(rows, month_sheet, where=None):
+    """Achievements of one month sheet with decoded points
+
+    ``where(row, col)`` names a points cell when reporting bad values.
+    """
+    records = list(iter_records(rows))
+    if not records:
+        return pd.DataFrame()
+    categories, students, points, teams, cell_rows, cell_cols = (
+        np.array(values, dtype=object) for values in zip(*records)
+    )
+    return pd.DataFrame({
+        'student': students,
+        'points': decode_numbers(
+            points, f"achievements:{month_sheet}",
+            (lambda n: where(cell_rows[n], cell_cols[n])) if where else None
+        ),
+        'category': categories,
+        'team': teams,
+        'month': month_sheet,
+    })
+
+
+# ========== INDEXED STORE ==========
+class AchievementsIndex:
+    """Achievements of several months, indexed for filtering
+
+    Built once per data version. Text columns are categoricals and the
+    row positions of every (category, team, month) group are computed
+    up front, so a filter is a dictionary lookup plus a take() instead
+    of boolean scans over the whole frame.
+    """
+
+    KEYS = ('category', 'team', 'month')
+
+    def __init__(self, frame, version=None, months=None):
+        self.version = version
+        frame = frame.reset_index(drop=True) if not frame.empty else pd.DataFrame(
+            columns=['student', 'points', 'category', 'team', 'month'])
+        for name in ('student', 'category', 'team'):
+            # Categories in order of first appearance, the order the sheets list them in
+            frame[name] = pd.Categorical(frame[name], categories=pd.unique(frame[name]))
+        month_order = [month for month in (months or pd.unique(frame['month']))
+                       if month in set(frame['month'])]
+        frame['month'] = pd.Categorical(frame['month'], categories=month_order, ordered=True)
+        self.frame = frame
+
+        self.groups = {
+            key: positions
+            for key, positions in frame.groupby(list(self.KEYS), observed=True, sort=False).indices.items()
+        }
+        self._selections = {}
+
+    def __len__(self):
+        return len(self.frame)
+
+    @property
+    def empty(self):
+        return self.frame.empty
+
+    def options(self, key):
+        """Values of ``key`` that occur, in sheet order"""
+        return list(self.frame[key].cat.categories)
+
+    def positions(self, category=None, team=None, month=None):
+        """Row positions matching the filters in sheet order; None matches all"""
+        wanted = (category, team, month)
+        if wanted not in self._selections:
+            parts = [
+                positions for key, positions in self.groups.items()
+                if all(want is None or want == got for want, got in zip(wanted, key))
+            ]
+            self._selections[wanted] = (
+                np.sort(np.concatenate(parts)) if parts else np.empty(0, dtype=np.intp)
+            )
+        return self._selections[wanted]
+
+    def select(self, category=None, team=None, month=None):
+        """Rows matching the filters, as a frame"""
+        return self.frame.take(self.positions(category, team, month))
+
+    def breakdown(self, category=None, team=None, month=None):
+        """``{category: {team: rows}}`` of the matching rows, in sheet order"""
+        result = {}
+        for name in self.options('category'):
+            if category is not None and name != category:
+                continue
+            teams = {}
+            for team_name in self.options('team'):
+                if team is not None and team_name != team:
+                    continue
+                rows = self.positions(name, team_name, month)
+                if len(rows):
+                    teams[team_name] = self.frame.take(rows)
+            if teams:
+                result[name] = teams
+        return result
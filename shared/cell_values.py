@@ -0,0 +1,72 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from shared.metrics import metrics
+
+# Arabic-Indic and Persian digits, as typed on Arabic keyboards
+_DIGITS = str.maketrans('٠١٢٣٤٥٦٧٨٩۰۱۲۳۴۵۶۷۸۹', '0123456789' * 2)
+
+# Thousands separators: comma, Arabic thousands sign, apostrophe and spaces
+_GROUPING = re.compile(r"[,٬'\s]")
+_ARABIC_DECIMAL = '٫'
+
+# Cells that mean "no points" rather than a typo
+BLANKS = ('', '-')
+
+# Unreadable cells found by the latest decode of each dataset: dataset -> [(cell, value)]
+bad_cells = {}
+
+
+def decode_numbers(values, dataset, where=None):
+    """Numbers in a sequence of sheet cells, as a float Series
+
+    Typed cells (UNFORMATTED_VALUE) pass straight through; text is
+    cleaned column-wise, so stored FORMATTED_VALUE copies decode too.
+    Blank cells are 0. Anything else that is not a number is NaN and is
+    reported under ``dataset``; ``where(position)`` names the cell.
+    """
+    cells = np.asarray(values, dtype=object)
+    blank = pd.isna(cells) | (cells == '') | (cells == '-')
+    filled = np.where(blank, 0, cells)
+    try:
+        # Typed cells and plain numeric text convert in one C loop
+        numbers = filled.astype(float)
+    except (TypeError, ValueError):
+        numbers = np.array(pd.to_numeric(pd.Series(filled), errors='coerce'), dtype=float)
+
+    bad = np.isnan(numbers)
+    if bad.any():
+        text = pd.Series(cells[bad]).astype(str).str.strip()
+        cleaned = (
+            text.str.translate(_DIGITS)
+                .str.replace(_GROUPING, '', regex=True)
+                .str.replace(_ARABIC_DECIMAL, '.', regex=False)
+        )
+        parsed = pd.to_numeric(cleaned, errors='coerce').mask(text.isin(BLANKS), 0.0)
+        numbers[bad] = parsed.to_numpy(dtype=float)
+        bad[bad] = np.isnan(numbers[bad])
+
+    report_bad_cells(dataset, [
+        (where(position) if where else str(position), cells[position])
+        for position in np.flatnonzero(bad)
+    ])
+    return pd.Series(numbers)
+
+
+def format_points(value, spec=',.0f'):
+    """Points as shown on the boards; '–' for an unreadable (NaN) cell"""
+    return '–' if pd.isna(value) else format(value, spec)
+
+
+def report_bad_cells(dataset, cells):
+    """Remember and log the unreadable cells of ``dataset``"""
+    if cells:
+        bad_cells[dataset] = cells
+        metrics.count('bad_cells', dataset, 'decode', len(cells))
+        shown = ", ".join(f"{cell}={value!r}" for cell, value in cells[:5])
+        more = f" and {len(cells) - 5} more" if len(cells) > 5 else ""
+        print(f"Unreadable numbers in {dataset}: {shown}{more}")
+    else:
+        bad_cells.pop(dataset, None)
@@ -1,358 +1,840 @@
+import contextvars
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from types import MappingProxyType
+from typing import Mapping
+
 import pandas as pd
 import gspread
+from google.auth.transport.requests import Request as AuthRequest
 from google.oauth2.service_account import Credentials
 import streamlit as st
 
+from shared.achievements import AchievementsIndex, parse_month_sheet
+from shared.cell_values import decode_numbers
+from shared.envelope import Envelope, content_hash
+from shared.history import HistoryLog
+from shared.metrics import metrics
+from shared.ranking import TOP_STUDENTS, Leaderboard, PointEvent, StudentScores
+from shared.roster import StudentTable
+from shared.scheduler import PRIORITY_ACHIEVEMENTS, PRIORITY_CORE, PRIORITY_TEAMS, read_scheduler
+from shared.layout import (
+    LAYOUT, MONTH_SHEETS, SPREADSHEET_ID, STUDENT_FIELDS, TEAMS, WEEKS,
+    gather, month_block, plan_ranges,
+)
+from shared.sheets_standin import StandInSession
+from shared.snapshot_store import SnapshotStore
+
 SCOPES = ['https://www.googleapis.com/auth/spreadsheets']
-SPREADSHEET_ID = '1-u_eNtf-ApcFdzk9CzNZilRHrLRgxveuxr8j4UQqBmI'
+
+# Base URL of a local Sheets stand-in to use instead of Google, e.g. http://127.0.0.1:8765
+SHEETS_API_URL = os.environ.get("SHEETS_API_URL", "")
+
+# Seconds a cached dataset counts as fresh before it is refreshed
+DATASET_TTLS = {
+    'teams': 60,
+    'students': 180,
+    'weekly': 180,
+    'weekly_fallback': 180,
+}
+ACHIEVEMENTS_TTL = 300
+
+# Read scheduler priority per dataset, see shared.scheduler
+DATASET_PRIORITIES = {
+    'teams': PRIORITY_TEAMS,
+    'students': PRIORITY_CORE,
+    'weekly': PRIORITY_CORE,
+    'weekly_fallback': PRIORITY_CORE,
+}
+
+# Month sheets fetched at once by month_snapshots
+MONTH_WORKERS = 4
+
+# Longest one process may hold a refresh lease, and how often others check it
+LEASE_SECONDS = 30
+LEASE_POLL_SECONDS = 0.1
+
+
+# ========== CLIENT POOL ==========
+class _Spreadsheet(gspread.Spreadsheet):
+    """Spreadsheet that keeps the metadata it was opened with, worksheets included"""
+
+    def fetch_sheet_metadata(self, *args, **kwargs):
+        self.metadata = super().fetch_sheet_metadata(*args, **kwargs)
+        return self.metadata
+
+
+class SheetsClientPool:
+    """Authorized spreadsheet and worksheet handles shared by all threads
+
+    The service account token is exchanged once and reused until it
+    expires, and the worksheet list is re-read only every
+    ``worksheet_ttl`` seconds, so a warm pool reaches Google with nothing
+    but the data request itself.
+    """
+
+    def __init__(self, spreadsheet_id, scopes=SCOPES, worksheet_ttl=600, api_url=SHEETS_API_URL):
+        self.spreadsheet_id = spreadsheet_id
+        self.scopes = scopes
+        self.worksheet_ttl = worksheet_ttl
+        self.api_url = api_url
+        self._lock = threading.RLock()
+        self._credentials = None
+        self._spreadsheet = None
+        self._worksheets = {}
+        self._worksheets_loaded_at = 0.0
+
+    def _ensure_token(self):
+        if self._credentials is None:
+            self._credentials = Credentials.from_service_account_info(
+                st.secrets["gcp_service_account"],
+                scopes=self.scopes
+            )
+        # Refresh under the lock so concurrent sessions don't all exchange tokens
+        if not self._credentials.valid:
+            with metrics.timed('auth', 'token'):
+                self._credentials.refresh(AuthRequest())
+
+    def spreadsheet(self, priority=PRIORITY_CORE):
+        """Opened spreadsheet with a valid access token"""
+        with self._lock:
+            if self.api_url:
+                # Local stand-in, see shared.sheets_standin; no credentials involved
+                if self._spreadsheet is not None:
+                    return self._spreadsheet
+                client = gspread.authorize(None, session=StandInSession(self.api_url))
+            else:
+                self._ensure_token()
+                if self._spreadsheet is not None:
+                    return self._spreadsheet
+                client = gspread.authorize(self._credentials)
+        # Wait for the read outside the lock, so a low priority reader never
+        # holds up the others; whoever gets through first opens it
+        with read_scheduler.read('spreadsheet', priority):
+            with self._lock:
+                if self._spreadsheet is None:
+                    self._open(client)
+                return self._spreadsheet
+
+    def _open(self, client):
+        with metrics.timed('spreadsheet', 'open'):
+            self._spreadsheet = _Spreadsheet(client.http_client, {'id': self.spreadsheet_id})
+        # Opening read the metadata, which lists the worksheets too
+        self._load_worksheets(self._spreadsheet, self._spreadsheet.metadata)
+
+    def _load_worksheets(self, sheet, metadata):
+        self._worksheets = {}
+        for entry in metadata['sheets']:
+            properties = entry['properties']
+            self._worksheets[properties['title']] = gspread.Worksheet(sheet, properties, sheet.id, sheet.client)
+        self._worksheets_loaded_at = time.monotonic()
+
+    def _worksheets_stale(self):
+        age = time.monotonic() - self._worksheets_loaded_at
+        return not self._worksheets or age > self.worksheet_ttl
+
+    def worksheets(self, priority=PRIORITY_CORE):
+        """Worksheet handles by title"""
+        sheet = self.spreadsheet(priority)
+        with self._lock:
+            if not self._worksheets_stale():
+                return dict(self._worksheets)
+        # As in spreadsheet(), the read is waited for outside the lock
+        with read_scheduler.read('spreadsheet', priority):
+            with self._lock:
+                # Another reader may have re-listed them while this one waited
+                if self._worksheets_stale():
+                    with metrics.timed('spreadsheet', 'metadata'):
+                        metadata = sheet.fetch_sheet_metadata()
+                    self._load_worksheets(sheet, metadata)
+                return dict(self._worksheets)
+
+    def worksheet(self, title):
+        """Cached handle of one worksheet"""
+        ws = self.worksheets().get(title)
+        if ws is None:
+            raise gspread.WorksheetNotFound(title)
+        return ws
+
+    def invalidate(self, credentials=False):
+        """Forget worksheet handles, and the token too if it was rejected"""
+        with self._lock:
+            self._worksheets = {}
+            if credentials:
+                self._credentials = None
+                self._spreadsheet = None
+
+
+_client_pool = SheetsClientPool(SPREADSHEET_ID)
+
+
+def get_client_pool():
+    """Process-wide Sheets client pool"""
+    return _client_pool
 
 
 def get_google_sheet():
     """Connect to Google Sheets"""
-    credentials = Credentials.from_service_account_info(
-        st.secrets["gcp_service_account"],
-        scopes=SCOPES
-    )
-    return gspread.authorize(credentials).open_by_key(SPREADSHEET_ID)
+    return _client_pool.spreadsheet()
 
 
-def get_team_data():
-    """Get team leaderboard data"""
+# ========== SNAPSHOT ==========
+@dataclass(frozen=True)
+class Snapshot:
+    """Immutable copy of every sheet range read in one refresh"""
+    values: Mapping[str, tuple]
+    sheet_titles: tuple
+    fetched_at: datetime     # Fetch time of the oldest dataset
+    # 'sheets'; 'shared' when another process fetched it; 'seed' for the saved
+    # copy a new process starts from; 'store' for one served because a fetch failed
+    source: str = 'sheets'
+    # Fetch time of each dataset; those left out were fetched at ``fetched_at``
+    fetch_times: Mapping[str, datetime] = field(default_factory=dict, compare=False, repr=False)
+    _fingerprints: dict = field(default_factory=dict, compare=False, repr=False)
+
+    def rows(self, key):
+        """Rows of one dataset as lists; KeyError if it was not fetched"""
+        if key not in self.values:
+            raise KeyError(f"'{key}' is not in the snapshot")
+        return [list(row) for row in self.values[key]]
+
+    def has(self, key):
+        """Whether a dataset was fetched into this snapshot"""
+        return key in self.values
+
+    def fetched_at_of(self, keys):
+        """Fetch time of the oldest of ``keys`` held here, ``fetched_at`` if none is"""
+        times = [self.fetch_times.get(key, self.fetched_at) for key in keys if key in self.values]
+        return min(times, default=self.fetched_at)
+
+    def fingerprint(self, key):
+        """Content hash of one dataset's raw values, computed once"""
+        if key not in self._fingerprints:
+            digest = hashlib.blake2b(digest_size=16)
+            for row in self.values[key]:
+                digest.update('\x1f'.join(map(str, row)).encode())
+                digest.update(b'\x1e')
+            self._fingerprints[key] = digest.hexdigest()
+        return self._fingerprints[key]
+
+    def covers(self, datasets=None, months=MONTH_SHEETS):
+        """Whether every requested range that exists upstream is in here"""
+        for key in (LAYOUT if datasets is None else datasets):
+            if LAYOUT[key].sheet in self.sheet_titles and key not in self.values:
+                return False
+        return all(
+            month not in self.sheet_titles or month_key(month) in self.values
+            for month in months
+        )
+
+    def merged(self, newer):
+        """This snapshot with the datasets of ``newer`` swapped in"""
+        fingerprints = {key: value for key, value in self._fingerprints.items() if key not in newer.values}
+        fingerprints.update(newer._fingerprints)
+        fetch_times = {key: self.fetched_at_of([key]) for key in self.values if key not in newer.values}
+        fetch_times.update((key, newer.fetched_at_of([key])) for key in newer.values)
+        return Snapshot(
+            MappingProxyType({**self.values, **newer.values}), newer.sheet_titles,
+            min(fetch_times.values(), default=newer.fetched_at), newer.source,
+            MappingProxyType(fetch_times), fingerprints
+        )
+
+
+def month_key(month_sheet):
+    """Snapshot key of a month achievements sheet"""
+    return f"month:{month_sheet}"
+
+
+def dataset_label(datasets=None, months=MONTH_SHEETS):
+    """Short name of a set of datasets for metrics, e.g. 'students,teams'"""
+    names = {key.replace('_fallback', '') for key in (LAYOUT if datasets is None else datasets)}
+    if months:
+        names.add('achievements' if len(months) > 1 else f"achievements:{months[0]}")
+    return ','.join(sorted(names)) or 'none'
+
+
+def read_priority(datasets=None, months=MONTH_SHEETS):
+    """Scheduler priority of a fetch: that of its most urgent dataset"""
+    priorities = [DATASET_PRIORITIES[key] for key in (LAYOUT if datasets is None else datasets)]
+    if months:
+        priorities.append(PRIORITY_ACHIEVEMENTS)
+    return min(priorities) if priorities else PRIORITY_CORE
+
+
+def _retry_after(response):
     try:
-        sheet = get_google_sheet()
-        ws = sheet.worksheet("OFFICE WORKING")
-        
-        # Teams are in rows 48-51
-        team_positions = [
-            ('الشمس', 48),
-            ('القمر', 49),
-            ('الزهرة', 50),
-            ('المشتري', 51)
+        return float(response.headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+
+def fetch_snapshot(datasets=None, months=MONTH_SHEETS):
+    """Read all requested datasets with a single values.batchGet call
+
+    The layout of each dataset is compiled into the fewest ranges that
+    hold its cells (see shared.layout), and each dataset is cut back out
+    of them, so shared cells are read once and unused ones not at all.
+    """
+    label = dataset_label(datasets, months)
+    priority = read_priority(datasets, months)
+    pool = get_client_pool()
+    values = {}
+    try:
+        sheet = pool.spreadsheet(priority)
+        titles = tuple(pool.worksheets(priority))
+
+        # Sheets that don't exist are left out, a missing range fails the whole batch
+        blocks = {key: LAYOUT[key] for key in (LAYOUT if datasets is None else datasets)}
+        blocks.update((month_key(month), month_block(month)) for month in months)
+        blocks = {key: block for key, block in blocks.items() if block.sheet in titles}
+        plan = plan_ranges(blocks.values())
+
+        if plan:
+            with read_scheduler.read(label, priority), metrics.timed(label, 'batchGet'):
+                response = sheet.values_batch_get(
+                    [fetched.a1 for fetched in plan],
+                    params={
+                        # Typed numbers instead of display text; dates stay readable
+                        'valueRenderOption': 'UNFORMATTED_VALUE',
+                        'dateTimeRenderOption': 'FORMATTED_STRING',
+                    }
+                )
+    except gspread.exceptions.APIError as e:
+        status = e.response.status_code
+        if status == 429:
+            # Quota exhausted: hold every read back instead of retrying into it
+            read_scheduler.throttle(label, _retry_after(e.response))
+        else:
+            # A sheet was renamed/deleted or the token revoked; re-list next time
+            pool.invalidate(credentials=status == 401)
+        raise
+
+    if plan:
+        # valueRanges come back in request order; empty ranges have no 'values'
+        fetched = [
+            tuple(tuple(row) for row in value_range.get('values', []))
+            for value_range in response.get('valueRanges', [])
         ]
-        
-        teams = []
-        
-        for team_name, row_num in team_positions:
+        for key, block in blocks.items():
+            values[key] = gather(block, plan, fetched)
+
+    snapshot = Snapshot(MappingProxyType(values), titles, datetime.now())
+    save_snapshot(snapshot)
+    record_history(snapshot)
+    return snapshot
+
+
+# ========== LAST-KNOWN-GOOD STORE ==========
+_snapshot_store = SnapshotStore()
+
+
+def team_totals(snapshot):
+    """Team totals as the sheet has them, a float Series in TEAMS order"""
+    rows = snapshot.rows('teams')
+    # One row per team, see LAYOUT['teams']
+    cells = [rows[offset][0] if offset < len(rows) and rows[offset] else ''
+             for offset in range(len(TEAMS))]
+    return decode_numbers(cells, 'teams', lambda i: LAYOUT['teams'].cell(i, 0))
+
+
+def save_snapshot(snapshot):
+    """Persist a fetched snapshot; a failing disk never fails the fetch"""
+    try:
+        _snapshot_store.save(snapshot.values, snapshot.sheet_titles, snapshot.fetched_at,
+                             snapshot.fetch_times)
+    except Exception as e:
+        print(f"Error saving snapshot: {e}")
+
+
+def stored_snapshot(datasets=None, months=MONTH_SHEETS, source='store'):
+    """Last saved snapshot of the requested datasets, None unless all are saved"""
+    keys = list(LAYOUT if datasets is None else datasets)
+    keys += [month_key(month) for month in months]
+    try:
+        stored = _snapshot_store.load(keys)
+    except Exception as e:
+        print(f"Error reading saved snapshot: {e}")
+        return None
+    if stored is None:
+        return None
+    values, titles, fetched_at, fetch_times = stored
+    snapshot = Snapshot(MappingProxyType(values), titles, fetched_at, source=source,
+                        fetch_times=MappingProxyType(fetch_times))
+    return snapshot if snapshot.covers(datasets, months) else None
+
+
+def stored_updates(snapshot, seen):
+    """Datasets of ``snapshot`` the store holds newer copies of than ``seen``
+
+    ``seen`` maps keys to the fetch time already folded in and is
+    updated. Returns a snapshot of just those datasets, or None; reading
+    them costs no API call.
+    """
+    times = _snapshot_store.fetch_times()
+    keys = [key for key, fetched_at in times.items()
+            if snapshot.has(key) and fetched_at > seen.get(key, 0)]
+    if not keys:
+        return None
+    stored = _snapshot_store.load(keys)
+    if stored is None:
+        return None
+    values, titles, fetched_at, fetch_times = stored
+    seen.update((key, times[key]) for key in keys)
+    return Snapshot(MappingProxyType(values), titles, fetched_at, source='shared',
+                    fetch_times=MappingProxyType(fetch_times))
+
+
+def load_shared_snapshot(datasets=None, months=MONTH_SHEETS, max_age=None):
+    """Snapshot at most ``max_age`` seconds old, fetched by one process per host
+
+    Processes sharing the store take turns through a lease: the holder
+    fetches and saves, everyone else reads back what it saved, so any
+    number of kiosks and admin sessions cost one upstream read.
+    """
+    datasets = tuple(LAYOUT if datasets is None else datasets)
+    months = tuple(months)
+    if max_age is None:
+        max_age = snapshot_ttl(datasets, months)
+    label = dataset_label(datasets, months)
+
+    def fresh_copy():
+        stored = stored_snapshot(datasets, months, source='shared')
+        if stored is not None and (datetime.now() - stored.fetched_at).total_seconds() < max_age:
+            metrics.count('cache_hit', label, 'shared')
+            return stored
+        return None
+
+    deadline = time.monotonic() + LEASE_SECONDS
+    while True:
+        snapshot = fresh_copy()
+        if snapshot is not None:
+            return snapshot
+        if _snapshot_store.acquire(label, LEASE_SECONDS):
             try:
-                points_cell = ws.acell(f'D{row_num}', value_render_option='FORMATTED_VALUE').value
-                
-                if points_cell:
-                    try:
-                        cleaned = str(points_cell).replace(',', '').strip()
-                        points = float(cleaned) if cleaned else 0
-                    except:
-                        points = 0
-                else:
-                    points = 0
-                
-                teams.append({
-                    'team': team_name,
-                    'points': points
-                })
-                
-            except Exception:
-                teams.append({
-                    'team': team_name,
-                    'points': 0
-                })
+                # Another process may have saved while we waited for the lease
+                return fresh_copy() or fetch_snapshot(datasets, months)
+            finally:
+                _snapshot_store.release(label)
+        if time.monotonic() > deadline:
+            # The lease holder looks stuck; don't wait on it any longer
+            return fetch_snapshot(datasets, months)
+        time.sleep(LEASE_POLL_SECONDS)
+
+
+# ========== HISTORY ==========
+_history = HistoryLog()
+
+
+def history_series(team):
+    return f"team:{team}"
+
+
+def record_history(snapshot):
+    """Log the team totals of a fetched snapshot where they changed; never fails the fetch"""
+    if not snapshot.has('teams'):
+        return
+    try:
+        points = team_totals(snapshot)
+        _history.append(snapshot.fetched_at_of(['teams']), {
+            history_series(team): float(value) for team, value in zip(TEAMS, points) if value == value
+        })
+    except Exception as e:
+        print(f"Error logging team history: {e}")
+
+
+def get_team_history(start=None, end=None, resolution=None):
+    """``(resolution, frame)`` of team totals over time, from the local log only
+
+    The frame has team, time and points columns; see HistoryLog.query
+    for how the resolution is picked.
+    """
+    names = {history_series(team): team for team in TEAMS}
+    resolution, frame = _history.query(list(names), start, end, resolution)
+    frame = frame.rename(columns={'series': 'team', 'value': 'points'})
+    frame['team'] = frame['team'].map(names)
+    return resolution, frame
+
+
+# ========== CACHE ==========
+class SWRCache:
+    """Bounded stale-while-revalidate cache, safe to share across threads
+
+    A fresh entry is returned as is. An expired entry is still returned
+    while one background thread reloads it, for up to ``max_stale``
+    seconds past its TTL; only a missing or too-old entry makes the
+    caller wait for the loader.
+    """
+
+    def __init__(self, max_entries=32, max_stale=3600):
+        self.max_entries = max_entries
+        self.max_stale = max_stale
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (value, stored_at)
+        self._refreshing = set()
+        self._key_locks = {}
+
+    def get(self, key, loader, ttl, label='cache'):
+        """Cached value of ``key``, calling ``loader()`` to (re)fill it"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                value, stored_at = entry
+                age = time.monotonic() - stored_at
+                if age < ttl:
+                    metrics.count('cache_hit', label, 'cache')
+                    return value
+                if age < ttl + self.max_stale:
+                    if key not in self._refreshing:
+                        self._refreshing.add(key)
+                        threading.Thread(
+                            target=self._refresh, args=(key, loader), daemon=True
+                        ).start()
+                    metrics.count('cache_stale', label, 'cache')
+                    return value
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # Concurrent misses on one key wait for a single load
+        metrics.count('cache_miss', label, 'cache')
+        with key_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and time.monotonic() - entry[1] < ttl:
+                    return entry[0]
+            value = loader()
+            self._store(key, value)
+            return value
+
+    def seed(self, key, value, age):
+        """Store ``value`` as if loaded ``age`` seconds ago, unless cached"""
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = (value, time.monotonic() - age)
+
+    def _refresh(self, key, loader):
+        try:
+            self._store(key, loader())
+        except Exception as e:
+            print(f"Background refresh of {key} failed, serving stale: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _store(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self._key_locks.pop(evicted, None)
+
+    def clear(self):
+        """Drop every entry so the next read goes to Google"""
+        with self._lock:
+            self._entries.clear()
+
+
+_snapshot_cache = SWRCache()
+_published_snapshot = None
+_seeded_keys = set()
+
+
+def snapshot_ttl(datasets=None, months=MONTH_SHEETS):
+    """Freshness of a snapshot: the shortest TTL of what it contains"""
+    ttls = [DATASET_TTLS[key] for key in (LAYOUT if datasets is None else datasets)]
+    if months:
+        ttls.append(ACHIEVEMENTS_TTL)
+    return min(ttls) if ttls else ACHIEVEMENTS_TTL
+
+
+def publish_snapshot(snapshot):
+    """Make ``snapshot`` the one every reader gets, see shared.refresher"""
+    global _published_snapshot
+    _published_snapshot = snapshot
+
+
+def published_snapshot():
+    """Latest snapshot published by a background refresher, if any"""
+    return _published_snapshot
+
+
+def get_snapshot(datasets=None, months=MONTH_SHEETS):
+    """Cached snapshot, served stale while a newer one is fetched"""
+    datasets = tuple(LAYOUT if datasets is None else datasets)
+    months = tuple(months)
+    # While a refresher keeps a snapshot hot, readers never go to Google
+    label = dataset_label(datasets, months)
+    published = _published_snapshot
+    if published is not None and published.covers(datasets, months):
+        metrics.count('cache_hit', label, 'published')
+        return published
+    
+    # A new process starts from the saved copy and refreshes it in the background
+    key = (datasets, months)
+    if key not in _seeded_keys:
+        _seeded_keys.add(key)
+        stored = stored_snapshot(datasets, months, source='seed')
+        if stored is not None:
+            age = (datetime.now() - stored.fetched_at).total_seconds()
+            _snapshot_cache.seed(key, stored, age)
+    
+    try:
+        return _snapshot_cache.get(
+            key,
+            lambda: load_shared_snapshot(datasets, months),
+            snapshot_ttl(datasets, months),
+            label
+        )
+    except Exception as e:
+        # Upstream is down: serve the last real data, stamped with its own time
+        stored = stored_snapshot(datasets, months)
+        if stored is None:
+            raise
+        metrics.count('calls', label, 'store')
+        print(f"Serving snapshot saved at {stored.fetched_at:%Y-%m-%d %H:%M:%S}: {e}")
+        return stored
+
+
+def clear_cache():
+    """Forget cached snapshots, e.g. for a manual refresh"""
+    _snapshot_cache.clear()
+
+
+def load_snapshot(datasets=None, months=MONTH_SHEETS):
+    """Cached snapshot, or an empty one when Google Sheets is unreachable"""
+    try:
+        return get_snapshot(datasets, months)
+    except Exception as e:
+        print(f"Error fetching snapshot: {e}")
+        return Snapshot(MappingProxyType({}), (), datetime.now())
+
+
+# Names of the prefetches running in the background
+_prefetching = set()
+_prefetch_lock = threading.Lock()
+
+
+def prefetch(name, loader):
+    """Call ``loader()`` on a daemon thread to warm the caches it reads through
+
+    A prefetch still running under ``name`` is not started again. Its
+    reads are not counted against the caller's metrics collector.
+    Returns whether a thread was started.
+    """
+    with _prefetch_lock:
+        if name in _prefetching:
+            return False
+        _prefetching.add(name)
+    
+    def run():
+        try:
+            with metrics.timed(name, 'prefetch'):
+                loader()
+        except Exception as e:
+            print(f"Prefetch of {name} failed: {e}")
+        finally:
+            with _prefetch_lock:
+                _prefetching.discard(name)
+    
+    threading.Thread(target=run, name=f"scoreboard-prefetch-{name}", daemon=True).start()
+    return True
+
+
+# ========== DATASET VIEWS ==========
+@metrics.instrument('teams')
+def get_team_data(snapshot=None):
+    """Get team leaderboard data"""
+    try:
+        if snapshot is None:
+            snapshot = get_snapshot(['teams'], months=())
+        totals = dict(zip(TEAMS, team_totals(snapshot)))
         
-        df = pd.DataFrame(teams)
-        df = df.sort_values('points', ascending=False)
-        df['rank'] = range(1, len(df) + 1)
-        return df
+        # The sheet totals as of this fetch, plus any point events recorded since
+        as_of = snapshot.fetched_at_of(['teams']).timestamp()
+        leaderboard = get_leaderboard()
+        with leaderboard.lock:
+            current = leaderboard.bases['teams'][1]
+            if current is None or as_of >= current:
+                # The newest totals so far become the shared standings
+                leaderboard.set_base('teams', totals, as_of)
+                return leaderboard.team_table()
+        # An older snapshot, e.g. a saved copy, is ranked on its own totals
+        events = [event for _, event in point_events()]
+        return Leaderboard.rebuild({'teams': (totals, as_of)}, events).team_table()
         
     except Exception as e:
         st.error(f"Error getting team data: {e}")
-        # Return fallback data
-        return pd.DataFrame({
-            'team': ['الشمس', 'القمر', 'الزهرة', 'المشتري'],
-            'points': [67, 58, 45, 50],
-            'rank': [1, 2, 3, 4]
-        })
+        # No fetched or saved standings; show nothing rather than made-up ones
+        return pd.DataFrame(columns=['team', 'points', 'rank'])
 
 
-def get_student_data():
+@metrics.instrument('students')
+def get_student_data(snapshot=None):
     """Get individual student performance"""
     try:
-        sheet = get_google_sheet()
-        ws = sheet.worksheet("OFFICE WORKING")
-        
-        # Get student data from rows 4-43
-        data = ws.get_values('A4:H43')
-        
-        students = []
-        for row in data:
-            if len(row) >= 8:
-                students.append({
-                    'id': row[0] if row[0] else '',
-                    'group': row[1] if len(row) > 1 else '',
-                    'team': row[2] if len(row) > 2 else '',
-                    'name': row[3] if len(row) > 3 else '',
-                    'its': row[4] if len(row) > 4 else '',
-                    'grade': row[5] if len(row) > 5 else '',
-                    'gender': row[6] if len(row) > 6 else '',
-                    'eq_id': row[7] if len(row) > 7 else ''
-                })
+        if snapshot is None:
+            snapshot = get_snapshot(['students'], months=())
         
-        return pd.DataFrame(students)
+        # The API leaves trailing blank cells out, so rows are padded to
+        # every field. The roster ends at the first fully blank row; rows
+        # without a name or an ITS ID (the team totals among them) are
+        # not students and are left out
+        columns = list(STUDENT_FIELDS)
+        rows = [row[:len(columns)] + [''] * (len(columns) - len(row))
+                for row in snapshot.rows('students')]
+        # Typed values give numbers for IDs; the views treat every field as text
+        data = pd.DataFrame(rows, columns=columns, dtype=object).fillna('').astype(str)
+        blank = data.apply(lambda field: field.str.strip() == '').all(axis=1)
+        data = data[~blank.cummax()]
+        named = (data['name'].str.strip() != '') & (data['its'].str.strip() != '')
+        students = data[named]
+        if students.empty:
+            return pd.DataFrame()
+        return students.reset_index(drop=True)
         
     except Exception as e:
         st.error(f"Error getting student data: {e}")
         return pd.DataFrame()
 
 
-def get_weekly_data():
+# Latest StudentTable, shared by every session: (version, table)
+_student_table = (None, None)
+
+
+@metrics.instrument('students', 'table')
+def get_student_table(snapshot=None):
+    """Students of the known teams as a StudentTable, rebuilt when the roster changes"""
+    global _student_table
+    if snapshot is None:
+        snapshot = get_snapshot(['students'], months=())
+    version = snapshot.fingerprint('students') if snapshot.has('students') else None
+    cached_version, table = _student_table
+    if table is not None and cached_version == version:
+        metrics.count('cache_hit', 'students', 'table')
+        return table
+    metrics.count('cache_miss', 'students', 'table')
+    
+    students = get_student_data(snapshot)
+    if students.empty:
+        students = pd.DataFrame(columns=list(STUDENT_FIELDS))
+    table = StudentTable(students[students['team'].isin(TEAMS)], version)
+    _student_table = (version, table)
+    return table
+
+
+@metrics.instrument('weekly')
+def get_weekly_data(snapshot=None):
     """Get weekly breakdown from Points Table Monthly sheet"""
     try:
-        import re
+        if snapshot is None:
+            snapshot = get_snapshot(['weekly', 'weekly_fallback'], months=())
         
-        sheet = get_google_sheet()
+        teams, week_names = list(TEAMS), list(WEEKS)
         
         # Try to get data from Points Table Monthly sheet first
         try:
-            ws = sheet.worksheet("Points Table Monthly")
-            
-            # Get data from rows 6-10 (Weeks 1-5)
-            # Row indices: Week 1=5, Week 2=6, Week 3=7, Week 4=8, Week 5=9 (0-indexed)
-            weekly_data = []
-            teams = ['الشمس', 'القمر', 'الزهرة', 'المشتري']
-            week_names = ['Week 1', 'Week 2', 'Week 3', 'Week 4', 'Week 5']
+            rows = snapshot.rows('weekly')
             
-            # Column mapping for teams
-            team_cols = {
-                'الشمس': 0,  # Column A (0-indexed) - adjust based on actual sheet
-                'القمر': 1,  # Column B
-                'الزهرة': 2,  # Column C
-                'المشتري': 3   # Column D
-            }
-            
-            # Try to read the data
-            for week_idx, week_name in enumerate(week_names):
-                row_num = 5 + week_idx  # Start from row 6 (0-indexed: 5)
-                
-                try:
-                    # Read the entire row
-                    row_data = ws.row_values(row_num + 1)  # gspread is 1-indexed
-                    
-                    for team_name, col_idx in team_cols.items():
-                        if col_idx < len(row_data):
-                            cell_value = row_data[col_idx]
-                            points = 0
-                            
-                            if cell_value:
-                                try:
-                                    # Clean and convert
-                                    cleaned = str(cell_value).strip()
-                                    # Remove any formula references or special characters
-                                    if '=' in cleaned:
-                                        # Try to extract number from formula
-                                        nums = re.findall(r'\d+\.?\d*', cleaned)
-                                        if nums:
-                                            points = float(nums[0])
-                                    else:
-                                        points = float(cleaned.replace(',', ''))
-                                except:
-                                    points = 0
-                            
-                            weekly_data.append({
-                                'team': team_name,
-                                'week': week_name,
-                                'points': points
-                            })
-                except:
-                    # If row doesn't exist, add zeros
-                    for team_name in teams:
-                        weekly_data.append({
-                            'team': team_name,
-                            'week': week_name,
-                            'points': 0
-                        })
+            # One row per week, one column per team
+            grid = pd.DataFrame.from_records(rows[:len(week_names)])
+            grid = grid.reindex(index=range(len(week_names)), columns=range(len(teams)))
+            points = decode_numbers(
+                grid.to_numpy().ravel(), 'weekly',
+                lambda i: LAYOUT['weekly'].cell(i // len(teams), i % len(teams))
+            )
+            weekly_data = pd.DataFrame({
+                'team': teams * len(week_names),
+                'week': [week for week in week_names for _ in teams],
+                'points': points,
+            })
             
             # Check if we got valid data
-            total_points = sum(item['points'] for item in weekly_data)
-            
-            if total_points > 0:
-                return pd.DataFrame(weekly_data)
+            if weekly_data['points'].sum() > 0:
+                return weekly_data
                 
         except Exception as e:
             print(f"Error reading Points Table Monthly: {e}")
         
         # Fallback: Read from OFFICE WORKING sheet
-        ws = sheet.worksheet("OFFICE WORKING")
+        rows = snapshot.rows('weekly_fallback')
         
-        # Read team totals from rows 48-51
-        weekly_data = []
-        teams = ['الشمس', 'القمر', 'الزهرة', 'المشتري']
-        week_names = ['Week 1', 'Week 2', 'Week 3', 'Week 4', 'Week 5']
+        # One row per team, one column per January week
+        grid = pd.DataFrame.from_records(rows[:len(teams)])
+        grid = grid.reindex(index=range(len(teams)), columns=range(len(week_names)))
+        points = decode_numbers(
+            grid.to_numpy().ravel(), 'weekly_fallback',
+            lambda i: LAYOUT['weekly_fallback'].cell(i // len(week_names), i % len(week_names))
+        )
         
-        # Week columns in OFFICE WORKING (January section)
-        week_columns = {
-            'Week 1': 'I',
-            'Week 2': 'M',
-            'Week 3': 'Q',
-            'Week 4': 'U',
-            'Week 5': 'Y'
-        }
-        
-        # Team rows
-        team_rows = {
-            'الشمس': 48,
-            'القمر': 49,
-            'الزهرة': 50,
-            'المشتري': 51
-        }
-        
-        for team_name, row_num in team_rows.items():
-            for week_name, col_letter in week_columns.items():
-                try:
-                    cell_value = ws.acell(f"{col_letter}{row_num}").value
-                    points = 0
-                    
-                    if cell_value:
-                        try:
-                            cleaned = str(cell_value).strip()
-                            # Remove any formula or special characters
-                            if '=' in cleaned:
-                                # Try to get the calculated value
-                                try:
-                                    # Extract numbers from formula
-                                    nums = re.findall(r'\d+\.?\d*', cleaned)
-                                    if nums:
-                                        points = sum(float(num) for num in nums[:3])
-                                except:
-                                    pass
-                            else:
-                                points = float(cleaned.replace(',', ''))
-                        except:
-                            points = 0
-                    
-                    weekly_data.append({
-                        'team': team_name,
-                        'week': week_name,
-                        'points': points
-                    })
-                except:
-                    weekly_data.append({
-                        'team': team_name,
-                        'week': week_name,
-                        'points': 0
-                    })
-        
-        return pd.DataFrame(weekly_data)
+        return pd.DataFrame({
+            'team': [team for team in teams for _ in week_names],
+            'week': week_names * len(teams),
+            'points': points,
+        })
         
     except Exception as e:
         print(f"Error in get_weekly_data: {e}")
-        
-        # Return sample data as fallback
-        return pd.DataFrame({
-            'team': ['الشمس', 'القمر', 'الزهرة', 'المشتري'] * 5,
-            'week': ['Week 1']*4 + ['Week 2']*4 + ['Week 3']*4 + ['Week 4']*4 + ['Week 5']*4,
-            'points': [
-                555.5, 693.0, 604.0, 495.0,  # Week 1
-                24.0, 25.0, 26.0, 25.0,      # Week 2
-                13.0, 33.0, 19.0, 25.0,      # Week 3
-                20.0, 27.0, 27.0, 28.0,      # Week 4
-                18.0, 15.0, 26.0, 26.0       # Week 5
-            ]
-        })
+        # No fetched or saved weeks; show nothing rather than sample numbers
+        return pd.DataFrame(columns=['team', 'week', 'points'])
+
+
+# Sheet ranges behind each dataset view, for load_dataset
+DATASET_SOURCES = {
+    'teams': ('teams',),
+    'students': ('students',),
+    'weekly': ('weekly', 'weekly_fallback'),
+}
+
+
+def load_dataset(name, snapshot=None):
+    """``get_<name>_data`` as an Envelope: the frame, its content hash, fetch time and source
+
+    Compare envelopes with shared.envelope.diff to find what changed.
+    """
+    if snapshot is None:
+        snapshot = load_snapshot(DATASET_SOURCES[name], months=())
+    data = {'teams': get_team_data, 'students': get_student_data, 'weekly': get_weekly_data}[name](snapshot)
+    return Envelope(name, data, content_hash(data), snapshot.fetched_at_of(DATASET_SOURCES[name]),
+                    snapshot.source)
 
-def get_special_achievements(month_sheet):
+
+# Parsed achievements per month: month -> (fingerprint, DataFrame)
+_parsed_months = {}
+
+
+@metrics.instrument('achievements')
+def get_special_achievements(month_sheet, snapshot=None):
     """Get special achievements from monthly sheets like JAN, FEB, etc."""
     try:
-        sheet = get_google_sheet()
-        ws = sheet.worksheet(month_sheet)
+        if snapshot is None:
+            snapshot = get_snapshot([], months=[month_sheet])
         
-        # Get all data from the sheet
-        all_data = ws.get_all_values()
-        achievements = []
+        # A month whose raw values are unchanged reuses its parsed frame
+        key = month_key(month_sheet)
+        fingerprint = snapshot.fingerprint(key)
+        parsed = _parsed_months.get(month_sheet)
+        if parsed is not None and parsed[0] == fingerprint:
+            metrics.count('cache_hit', 'achievements', 'parse')
+            return parsed[1].copy()
+        metrics.count('cache_miss', 'achievements', 'parse')
         
-        current_category = ""
-        current_team = ""
-        
-        # Team columns mapping (based on your JAN sheet structure)
-        # Column positions: 0=SUN(الشمس), 2=MOON(القمر), 4=VENUS(الزهرة), 6=JUPITER(المشتري)
-        team_columns = {
-            0: "الشمس",  # SUN column
-            2: "القمر",  # MOON column
-            4: "الزهرة",  # VENUS column
-            6: "المشتري"   # JUPITER column
-        }
-        
-        i = 0
-        while i < len(all_data):
-            row = all_data[i]
-            
-            if not any(row):  # Skip empty rows
-                i += 1
-                continue
-            
-            # Check for category headers
-            row_text = " ".join(str(cell) for cell in row)
-            
-            if "Nihāʾī Ikhtibār" in row_text:
-                current_category = "Final Exam (Nihāʾī Ikhtibār)"
-                i += 2  # Skip header and column headers
-                continue
-            elif "Sub Sanawāt Ikhtibār" in row_text:
-                current_category = "Sub-Sanawat Exam (Sub Sanawāt Ikhtibār)"
-                i += 2  # Skip header and column headers
-                continue
-            elif "Marhala Ikhtibār" in row_text:
-                current_category = "Stage Exam (Marhala Ikhtibār)"
-                i += 2  # Skip header and column headers
-                continue
-            elif "Monthly Jadīd Target Achievers" in row_text:
-                current_category = "Monthly Target Achievers (Monthly Jadīd)"
-                i += 2  # Skip header and column headers
-                continue
-            elif "Student of the Week Achievers" in row_text:
-                current_category = "Student of the Week (SOTW)"
-                i += 2  # Skip header and column headers
-                continue
-            elif "Other Activities" in row_text or "Other Activities / Points" in row_text:
-                current_category = "Other Activities"
-                i += 2  # Skip header and column headers
-                continue
-            elif "Total points" in row_text:
-                # End of achievements section
-                break
-            
-            # Check for student/activity rows
-            # In your structure, each team has 2 columns: Student and Points
-            for col_idx, team_name in team_columns.items():
-                if col_idx < len(row):
-                    student = str(row[col_idx]).strip()
-                    points_cell = str(row[col_idx + 1]).strip() if col_idx + 1 < len(row) else ""
-                    
-                    # Check if this is a valid entry (not empty and not a dash)
-                    if student and student != "-" and student != "":
-                        # Try to parse points
-                        points = 0
-                        try:
-                            # Remove any non-numeric characters except decimal point
-                            points_str = "".join(ch for ch in points_cell if ch.isdigit() or ch == '.')
-                            if points_str:
-                                points = float(points_str)
-                        except:
-                            points = 0
-                        
-                        # Only add if we have points or it's a valid student entry
-                        if points > 0 or (student and student != "-"):
-                            achievements.append({
-                                'student': student,
-                                'points': points,
-                                'category': current_category,
-                                'team': team_name,
-                                'month': month_sheet
-                            })
-            
-            i += 1
+        df = parse_month_sheet(
+            snapshot.rows(key), month_sheet,
+            month_block(month_sheet).cell
+        )
         
         # Debug: Print what was found
-        if achievements:
-            print(f"Found {len(achievements)} achievements in {month_sheet}")
+        if not df.empty:
+            print(f"Found {len(df)} achievements in {month_sheet}")
         
-        return pd.DataFrame(achievements)
+        _parsed_months[month_sheet] = (fingerprint, df)
+        return df.copy()
         
     except Exception as e:
         print(f"Error getting achievements from {month_sheet}: {str(e)}")
@@ -360,5 +842,188 @@ def get_special_achievements(month_sheet):
         return pd.DataFrame()
 
 
+def month_snapshots(months=MONTH_SHEETS, snapshot=None):
+    """``(month, snapshot)`` of each month sheet that exists
+
+    Months without a sheet are skipped without a request, the rest are
+    fetched concurrently and cached one month at a time.
+    """
+    months = list(months)
+    if snapshot is None:
+        published = published_snapshot()
+        if published is not None and published.covers([], months):
+            snapshot = published
+    
+    if snapshot is not None:
+        return [(month, snapshot) for month in months if snapshot.has(month_key(month))]
+    
+    titles = get_client_pool().worksheets(PRIORITY_ACHIEVEMENTS)
+    existing = [month for month in months if month in titles]
+    
+    def load_month(month):
+        try:
+            return get_snapshot([], [month])
+        except Exception as e:
+            print(f"Error getting achievements from {month}: {e}")
+            return None
+    
+    if not existing:
+        return []
+    with ThreadPoolExecutor(max_workers=min(MONTH_WORKERS, len(existing))) as executor:
+        # Each task gets a copy of the caller's context so metrics reach its collector
+        futures = [
+            executor.submit(contextvars.copy_context().run, load_month, month)
+            for month in existing
+        ]
+        return [
+            (month, future.result())
+            for month, future in zip(existing, futures)
+            if future.result() is not None
+        ]
+
+
+# Latest AchievementsIndex, shared by every session: (version, index)
+_achievements_index = (None, None)
+
 
+@metrics.instrument('achievements', 'index')
+def get_achievements_index(months=MONTH_SHEETS, snapshot=None):
+    """Achievements of several months as an AchievementsIndex
 
+    The index is rebuilt only when the set of months or the content of
+    one of them changes; otherwise every rerun gets the same object and
+    its cached filter lookups.
+    """
+    global _achievements_index
+    try:
+        snapshots = month_snapshots(months, snapshot)
+    except Exception as e:
+        print(f"Error listing month sheets: {e}")
+        snapshots = []
+    
+    version = tuple((month, month_snapshot.fingerprint(month_key(month)))
+                    for month, month_snapshot in snapshots)
+    cached_version, index = _achievements_index
+    if index is not None and cached_version == version:
+        metrics.count('cache_hit', 'achievements', 'index')
+        return index
+    metrics.count('cache_miss', 'achievements', 'index')
+    
+    frames = [get_special_achievements(month, month_snapshot) for month, month_snapshot in snapshots]
+    frames = [frame for frame in frames if not frame.empty]
+    frame = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    index = AchievementsIndex(frame, version, months)
+    _achievements_index = (version, index)
+    return index
+
+
+# Running student totals shared by every reader, patched month by month
+_student_scores = StudentScores()
+
+# Team and student standings shared by every reader
+_leaderboard = Leaderboard()
+
+# Whether record_points ran in this process. Nothing else logs point
+# events yet, so until it does no read opens the event log.
+_points_recorded = False
+
+
+def point_events(after=0):
+    """``(id, PointEvent)`` of the events logged on this host after id ``after``"""
+    if not _points_recorded:
+        return []
+    try:
+        rows = _snapshot_store.events_after(after)
+    except Exception as e:
+        print(f"Error reading point events: {e}")
+        return []
+    return [(event_id, PointEvent(*fields)) for event_id, *fields in rows]
+
+
+def get_leaderboard():
+    """The shared Leaderboard, with the point events logged on this host applied"""
+    events = point_events(_leaderboard.last_event_id)
+    if events:
+        with _leaderboard.lock:
+            for event_id, event in events:
+                if event_id > _leaderboard.last_event_id:
+                    _leaderboard.apply(event, event_id)
+    return _leaderboard
+
+
+def record_points(team, delta, student=None, source='admin'):
+    """Log a point event and apply it to the standings right away
+
+    It counts until a fetch newer than it brings the sheet totals that
+    are taken to include it.
+    """
+    global _points_recorded
+    if team not in TEAMS:
+        raise ValueError(f"Unknown team: {team}")
+    event = PointEvent(team, student, float(delta), source, time.time())
+    _snapshot_store.append_event(event.team, event.student, event.delta, event.source, event.timestamp)
+    _points_recorded = True
+    get_leaderboard()
+    return event
+
+
+def get_top_students(k=TOP_STUDENTS, months=MONTH_SHEETS, snapshot=None):
+    """The ``k`` students with the most points, best first
+
+    Only months whose content changed since the last call are parsed;
+    their totals move the changed students in the shared leaderboard.
+    A roster change starts the totals over.
+    """
+    leaderboard = get_leaderboard()
+    try:
+        students_snapshot = snapshot or get_snapshot(['students'], months=())
+        roster = get_student_data(students_snapshot)
+        snapshots = month_snapshots(months, snapshot)
+    except Exception as e:
+        print(f"Error loading student rankings: {e}")
+        snapshots = None
+    
+    with _student_scores.lock:
+        if snapshots is not None:
+            if roster.empty:
+                roster = pd.DataFrame(columns=list(STUDENT_FIELDS))
+            version = students_snapshot.fingerprint('students') if students_snapshot.has('students') else None
+            changed = _student_scores.set_roster(roster[roster['team'].isin(TEAMS)], version)
+            
+            present = set()
+            for month, month_snapshot in snapshots:
+                present.add(month)
+                fingerprint = month_snapshot.fingerprint(month_key(month))
+                if _student_scores.versions.get(month) == fingerprint:
+                    metrics.count('cache_hit', 'achievements', 'scores')
+                    continue
+                metrics.count('cache_miss', 'achievements', 'scores')
+                _student_scores.update_month(month, fingerprint, get_special_achievements(month, month_snapshot))
+                changed = True
+            for month in set(_student_scores.versions) - present:
+                _student_scores.drop_month(month)
+                changed = True
+            
+            as_of = min((month_snapshot.fetched_at_of([month_key(month)]).timestamp()
+                         for month, month_snapshot in snapshots), default=None)
+            with leaderboard.lock:
+                current = leaderboard.bases['students'][1]
+                if changed or (as_of is not None and (current is None or as_of > current)):
+                    # Roster order first, so equal totals list the way the roster does
+                    totals = _student_scores.totals
+                    ordered = {key: totals[key] for key in _student_scores.order if key in totals}
+                    ordered.update(totals)
+                    leaderboard.set_base('students', ordered, as_of)
+        
+        with leaderboard.lock:
+            rows = []
+            for rank, key, points in leaderboard.students.ranked(k):
+                if not points > 0:
+                    break
+                team = leaderboard.student_teams.get(key, '')
+                name, team = _student_scores.students.get(key, (key, team))
+                rows.append({
+                    'rank': rank, 'its': key if key in _student_scores.ids else '',
+                    'name': name, 'team': team, 'points': points,
+                })
+    return pd.DataFrame(rows, columns=['rank', 'its', 'name', 'team', 'points'])
@@ -0,0 +1,95 @@
+import hashlib
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Mapping
+
+import pandas as pd
+
+# Columns naming one row of each dataset, which is what a diff reports
+ROW_KEYS = {
+    'teams': ('team',),
+    'students': ('its',),
+    'weekly': ('team', 'week'),
+}
+
+
+def content_hash(frame):
+    """Hash of a frame's columns and values, independent of its index"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update('\x1f'.join(map(str, frame.columns)).encode())
+    if len(frame):
+        digest.update(pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+@dataclass(frozen=True)
+class Envelope:
+    """One dataset view with its version and where and when its data came from"""
+    name: str
+    data: pd.DataFrame = field(repr=False)
+    version: str             # content_hash() of ``data``
+    fetched_at: datetime     # Fetch time of the oldest sheet range behind it
+    source: str              # 'sheets', 'shared', 'seed' or 'store', see Snapshot
+
+    @property
+    def age(self):
+        """Seconds since the data was read from the spreadsheet"""
+        return (datetime.now() - self.fetched_at).total_seconds()
+
+
+@dataclass(frozen=True)
+class Diff:
+    """Rows added, removed and changed between two versions of a dataset
+
+    Rows are named by the dataset's ROW_KEYS, a tuple when there are
+    several. ``changed`` maps a row to ``{column: (old, new)}``.
+    """
+    added: tuple = ()
+    removed: tuple = ()
+    changed: Mapping = field(default_factory=dict)
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed)
+
+    def moved(self, column='rank'):
+        """``{row: (old, new)}`` of the rows whose ``column`` changed"""
+        return {row: columns[column] for row, columns in self.changed.items() if column in columns}
+
+
+def _plain(value):
+    # numpy scalars as Python numbers, so diffs can go into JSON
+    return value.item() if hasattr(value, 'item') else value
+
+
+def _keyed(frame, keys):
+    return frame.drop_duplicates(list(keys)).set_index(list(keys))
+
+
+def diff(old, new, keys=None):
+    """What changed from envelope ``old`` to ``new``; ``old=None`` adds every row
+
+    Equal versions are compared by hash alone.
+    """
+    keys = keys or ROW_KEYS[new.name]
+    if old is not None and old.version == new.version:
+        return Diff()
+    after = _keyed(new.data, keys)
+    if old is None:
+        return Diff(added=tuple(after.index))
+    before = _keyed(old.data, keys)
+
+    common = after.index.intersection(before.index, sort=False)
+    columns = [column for column in after.columns if column in before.columns]
+    now, then = after.loc[common, columns], before.loc[common, columns]
+    differs = ~((now == then) | (now.isna() & then.isna()))
+    changed = {}
+    for row in common[differs.any(axis=1).to_numpy()]:
+        changed[row] = {
+            column: (_plain(then.at[row, column]), _plain(now.at[row, column]))
+            for column in columns if differs.at[row, column]
+        }
+    return Diff(
+        added=tuple(after.index.difference(before.index, sort=False)),
+        removed=tuple(before.index.difference(after.index, sort=False)),
+        changed=changed,
+    )
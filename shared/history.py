@@ -0,0 +1,168 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+from shared.snapshot_store import STORE_PATH
+
+# Append-only log of how the standings moved, next to the snapshot store
+HISTORY_PATH = os.environ.get(
+    "SCOREBOARD_HISTORY_PATH", os.path.join(os.path.dirname(STORE_PATH), "history.sqlite3")
+)
+
+# Resolutions a query can be answered at, finest first: name -> bucket seconds
+RESOLUTIONS = {'raw': None, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+# Most points per series a query returns before it moves to a coarser resolution
+MAX_POINTS = 1500
+
+
+class HistoryLog:
+    """SQLite time series of named values, e.g. each team's total points
+
+    A value is appended only when it differs from the series' latest
+    one, so the log holds changes, not polls. Points sit in a WITHOUT
+    ROWID table clustered by (series, time), and per-minute, per-hour
+    and per-day rollups (the last value in each) are kept as points arrive, so
+    a range query reads at most MAX_POINTS rows per series whatever the
+    size of the log.
+    """
+
+    def __init__(self, path=HISTORY_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._ready = False
+        self._series = {}  # name -> id
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=10)
+        if not self._ready:
+            with self._lock:
+                if not self._ready:
+                    connection.execute("PRAGMA journal_mode=WAL")
+                    connection.executescript("""
+                        CREATE TABLE IF NOT EXISTS series (
+                            id INTEGER PRIMARY KEY,
+                            name TEXT NOT NULL UNIQUE
+                        );
+                        CREATE TABLE IF NOT EXISTS points (
+                            series INTEGER NOT NULL,
+                            t INTEGER NOT NULL,
+                            value REAL NOT NULL,
+                            PRIMARY KEY (series, t)
+                        ) WITHOUT ROWID;
+                        CREATE TABLE IF NOT EXISTS rollups (
+                            seconds INTEGER NOT NULL,
+                            series INTEGER NOT NULL,
+                            bucket INTEGER NOT NULL,
+                            value REAL NOT NULL,
+                            PRIMARY KEY (seconds, series, bucket)
+                        ) WITHOUT ROWID;
+                    """)
+                    self._ready = True
+        return connection
+
+    def _series_id(self, connection, name):
+        if name not in self._series:
+            connection.execute("INSERT OR IGNORE INTO series (name) VALUES (?)", (name,))
+            self._series[name] = connection.execute(
+                "SELECT id FROM series WHERE name = ?", (name,)
+            ).fetchone()[0]
+        return self._series[name]
+
+    def append(self, at, values):
+        """Log ``{series: value}`` as of ``at`` for the series whose value changed
+
+        Safe to call from several processes for the same snapshot: the
+        check and the insert share one write transaction. Returns the
+        number of points written.
+        """
+        t = int(at.timestamp())
+        connection = self._connect()
+        connection.isolation_level = None
+        written = 0
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            for name, value in values.items():
+                series = self._series_id(connection, name)
+                latest = connection.execute(
+                    "SELECT t, value FROM points WHERE series = ? ORDER BY t DESC LIMIT 1", (series,)
+                ).fetchone()
+                if latest is not None and (latest[1] == value or latest[0] >= t):
+                    continue  # Unchanged, or older than what is logged
+                connection.execute("INSERT INTO points (series, t, value) VALUES (?, ?, ?)",
+                                   (series, t, value))
+                connection.executemany("""
+                    INSERT INTO rollups (seconds, series, bucket, value) VALUES (?, ?, ?, ?)
+                    ON CONFLICT (seconds, series, bucket) DO UPDATE SET value = excluded.value
+                """, [(seconds, series, t - t % seconds, value)
+                      for seconds in RESOLUTIONS.values() if seconds])
+                written += 1
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            self._series.clear()  # Ids made in the rolled back transaction are gone
+            raise
+        finally:
+            connection.close()
+        return written
+
+    def query(self, names, start=None, end=None, resolution=None, max_points=MAX_POINTS):
+        """``(resolution, frame)`` of the named series between ``start`` and ``end``
+
+        The frame has series, time and value columns; a rollup's value is
+        the last one in its bucket. Without ``resolution`` the finest
+        one giving at most ``max_points`` per series is used. Each series
+        also gets its value at ``start``, so charts begin where the
+        standings stood.
+        """
+        if not os.path.exists(self.path):
+            return resolution or 'raw', pd.DataFrame(columns=['series', 'time', 'value'])
+        first = int(start.timestamp()) if start is not None else 0
+        last = int(end.timestamp()) if end is not None else 2 ** 62
+        connection = self._connect()
+        try:
+            ids = dict(connection.execute(
+                "SELECT name, id FROM series WHERE name IN ({})".format(", ".join("?" * len(names))),
+                list(names)
+            ).fetchall()) if names else {}
+
+            def read(level, series, limit=-1):
+                seconds = RESOLUTIONS[level]
+                if seconds is None:
+                    sql = "SELECT t, value FROM points WHERE series = ? AND t BETWEEN ? AND ? ORDER BY t LIMIT ?"
+                    return connection.execute(sql, (series, first, last, limit)).fetchall()
+                sql = ("SELECT bucket, value FROM rollups WHERE seconds = ? AND series = ? "
+                       "AND bucket BETWEEN ? AND ? ORDER BY bucket LIMIT ?")
+                return connection.execute(sql, (seconds, series, first - first % seconds, last, limit)).fetchall()
+
+            if resolution is None:
+                # Finest level where no series goes past max_points
+                resolution = 'day'
+                for level in RESOLUTIONS:
+                    if all(len(read(level, series, max_points + 1)) <= max_points for series in ids.values()):
+                        resolution = level
+                        break
+
+            frames = []
+            for name, series in ids.items():
+                rows = read(resolution, series)
+                before = connection.execute(
+                    "SELECT t, value FROM points WHERE series = ? AND t < ? ORDER BY t DESC LIMIT 1",
+                    (series, first)
+                ).fetchone()
+                if before is not None and start is not None and not (rows and rows[0][0] <= first):
+                    rows.insert(0, (first, before[1]))
+                frames.append(pd.DataFrame({
+                    'series': name,
+                    # Local time, like Snapshot.fetched_at
+                    'time': pd.to_datetime([datetime.fromtimestamp(t) for t, _ in rows]),
+                    'value': [value for _, value in rows],
+                }))
+        finally:
+            connection.close()
+        frame = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['series', 'time', 'value'])
+        return resolution, frame
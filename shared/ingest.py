@@ -0,0 +1,143 @@
+import hmac
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from gspread.exceptions import IncorrectCellLabel
+
+from shared.layout import LAYOUT, MONTH_SHEETS
+from shared.metrics import metrics
+
+# Change notifications pushed when the spreadsheet is edited, so readers
+# don't wait for the next poll. The first process on the host to bind
+# the port serves them; it fetches only what an edit touched and saves
+# it to the shared store, where every other process picks it up.
+#
+# Apps Script, as an installable "On edit" trigger of the spreadsheet
+# (simple onEdit triggers may not call UrlFetchApp):
+#
+#   function notifyScoreboard(e) {
+#     UrlFetchApp.fetch('http://<host>:8766/notify', {
+#       method: 'post', contentType: 'application/json',
+#       headers: {'X-Scoreboard-Secret': '<SCOREBOARD_INGEST_SECRET>'},
+#       payload: JSON.stringify({sheet: e.range.getSheet().getName(),
+#                                range: e.range.getA1Notation()}),
+#     });
+#   }
+
+# Shared secret senders must present; notifications are off without one
+INGEST_SECRET = os.environ.get("SCOREBOARD_INGEST_SECRET", "")
+INGEST_HOST = os.environ.get("SCOREBOARD_INGEST_HOST", "127.0.0.1")
+INGEST_PORT = int(os.environ.get("SCOREBOARD_INGEST_PORT", "8766"))
+
+SECRET_HEADER = "X-Scoreboard-Secret"
+MAX_BODY_BYTES = 64 * 1024
+
+
+def ingest_enabled():
+    return bool(INGEST_SECRET)
+
+
+def affected(sheet, a1=None):
+    """``(datasets, months)`` an edit of ``a1`` on ``sheet`` can change
+
+    Without a range every dataset on the sheet counts. Month sheets are
+    parsed as a whole, so any edit there counts.
+    """
+    datasets = [key for key, block in LAYOUT.items()
+                if block.sheet == sheet and (a1 is None or block.overlaps(a1))]
+    months = [sheet] if sheet in MONTH_SHEETS else []
+    return datasets, months
+
+
+class IngestServer:
+    """HTTP endpoint taking ``POST /notify`` from the spreadsheet
+
+    The body is one ``{"sheet": ..., "range": ...}`` change or a list of
+    them; ``range`` is optional. Each accepted notification passes the
+    datasets it touches to ``notify(datasets, months)``.
+    """
+
+    def __init__(self, notify, secret=INGEST_SECRET, host=INGEST_HOST, port=INGEST_PORT):
+        self.notify = notify
+        self.secret = secret
+        self.host = host
+        self.port = port
+        self.server = None
+
+    def handle(self, changes):
+        """Datasets and months touched by ``changes``; ValueError if malformed"""
+        if isinstance(changes, dict):
+            changes = [changes]
+        if not isinstance(changes, list) or not changes:
+            raise ValueError("expected a change or a list of changes")
+        datasets, months = set(), set()
+        for change in changes:
+            if not isinstance(change, dict) or not isinstance(change.get('sheet'), str):
+                raise ValueError("every change needs a 'sheet'")
+            a1 = change.get('range')
+            if a1 is not None and not isinstance(a1, str):
+                raise ValueError("'range' must be an A1 range such as \"D48\"")
+            try:
+                touched, touched_months = affected(change['sheet'], a1 or None)
+            except IncorrectCellLabel:
+                raise ValueError(f"unreadable range: {a1!r}") from None
+            datasets.update(touched)
+            months.update(touched_months)
+        if datasets or months:
+            metrics.count('notifications', ','.join(sorted(datasets | months)), 'ingest')
+            self.notify(sorted(datasets), sorted(months))
+        return sorted(datasets), sorted(months)
+
+    def handler(self):
+        ingest = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def send_json(self, status, body):
+                data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                if self.path.split('?', 1)[0] != '/notify':
+                    return self.send_json(404, {'error': 'not found'})
+                presented = self.headers.get(SECRET_HEADER, '')
+                if not hmac.compare_digest(presented.encode(), ingest.secret.encode()):
+                    metrics.count('rejected', 'notify', 'ingest')
+                    return self.send_json(401, {'error': 'bad secret'})
+                length = int(self.headers.get('Content-Length') or 0)
+                if length > MAX_BODY_BYTES:
+                    return self.send_json(413, {'error': 'body too large'})
+                try:
+                    datasets, months = ingest.handle(json.loads(self.rfile.read(length) or b'null'))
+                except (ValueError, UnicodeDecodeError) as e:
+                    return self.send_json(400, {'error': str(e)})
+                # 202: the refresh runs in the background, nothing was read yet
+                self.send_json(202 if datasets or months else 200,
+                               {'datasets': datasets, 'months': months})
+
+        return Handler
+
+    def start(self):
+        """Serve from a daemon thread; None if another process has the port"""
+        try:
+            self.server = ThreadingHTTPServer((self.host, self.port), self.handler())
+        except OSError:
+            return None
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, name="scoreboard-ingest", daemon=True).start()
+        print(f"Accepting change notifications on http://{self.host}:{self.server.server_address[1]}/notify")
+        return self
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
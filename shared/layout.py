@@ -0,0 +1,194 @@
+import os
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Optional
+
+from gspread.utils import a1_range_to_grid_range, a1_to_rowcol, rowcol_to_a1
+
+# The one spreadsheet every app reads
+SPREADSHEET_ID = os.environ.get(
+    "SCOREBOARD_SPREADSHEET_ID", '1-u_eNtf-ApcFdzk9CzNZilRHrLRgxveuxr8j4UQqBmI'
+)
+
+TEAM_SHEET = "OFFICE WORKING"
+WEEKLY_SHEET = "Points Table Monthly"
+MONTH_SHEETS = ['JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUN',
+                'JUL', 'AUG', 'SEP', 'OCT', 'NOV', 'DEC']
+
+# Sheet order of the teams and weeks; adding one here extends every dataset below
+TEAMS = ('الشمس', 'القمر', 'الزهرة', 'المشتري')
+WEEKS = ('Week 1', 'Week 2', 'Week 3', 'Week 4', 'Week 5')
+
+STUDENT_FIELDS = ('id', 'group', 'team', 'name', 'its', 'grade', 'gender', 'eq_id')
+
+
+def column(letter):
+    """1-based number of a column letter"""
+    return a1_to_rowcol(f"{letter}1")[1]
+
+
+def span(first, count, step=1):
+    """``count`` row or column numbers from ``first``, ``step`` apart"""
+    return tuple(range(first, first + count * step, step))
+
+
+@dataclass(frozen=True)
+class Block:
+    """Where one dataset lives: the given sheet rows x columns, in order
+
+    Rows and columns are 1-based sheet numbers and need not be adjacent.
+    ``rows=None`` takes the columns from ``first_row`` down, however long
+    they are.
+    """
+    sheet: str
+    rows: Optional[tuple]
+    columns: tuple
+    first_row: int = 1
+
+    def cell(self, row, col):
+        """A1 name of the dataset's 0-based (row, col) cell"""
+        sheet_row = self.rows[row] if self.rows is not None else self.first_row + row
+        return f"{self.sheet}!{rowcol_to_a1(sheet_row, self.columns[col])}"
+
+    def overlaps(self, a1):
+        """Whether the range ``a1`` (no sheet name, e.g. "D48" or "A:C") holds any of the cells"""
+        grid = a1_range_to_grid_range(a1)
+        first_col, stop_col = grid.get('startColumnIndex', 0) + 1, grid.get('endColumnIndex')
+        first_row, stop_row = grid.get('startRowIndex', 0) + 1, grid.get('endRowIndex')
+        if not any(first_col <= col and (stop_col is None or col <= stop_col) for col in self.columns):
+            return False
+        if self.rows is None:
+            return stop_row is None or stop_row >= self.first_row
+        return any(first_row <= row and (stop_row is None or row <= stop_row) for row in self.rows)
+
+
+# Every dataset the scoreboard reads
+LAYOUT = {
+    'teams': Block(TEAM_SHEET, span(48, len(TEAMS)), (column('D'),)),           # Team totals
+    'students': Block(TEAM_SHEET, None, span(1, len(STUDENT_FIELDS)), 4),     # Roster, row 4 down
+    'weekly': Block(WEEKLY_SHEET, span(6, len(WEEKS)), span(1, len(TEAMS))),   # Weeks x teams
+    'weekly_fallback': Block(                                                  # Teams x January weeks
+        TEAM_SHEET, span(48, len(TEAMS)), span(column('I'), len(WEEKS), step=4)
+    ),
+}
+
+# Month sheets: a (student, points) column pair per team, as many rows as there are
+MONTH_COLUMNS = span(1, 2 * len(TEAMS))
+
+
+def month_block(month_sheet):
+    """Layout of a month achievements sheet"""
+    return Block(month_sheet, None, MONTH_COLUMNS)
+
+
+# ========== RANGE PLANNER ==========
+@dataclass(frozen=True)
+class Range:
+    """One rectangle to fetch; ``last_row=None`` runs to the end of the sheet"""
+    sheet: str
+    first_row: int
+    last_row: Optional[int]
+    first_col: int
+    last_col: int
+
+    @property
+    def a1(self):
+        title = "'{}'".format(self.sheet.replace("'", "''"))
+        if self.last_row is None:
+            # Open-ended: "A:H" from the top, "A4:H" from row 4
+            start = rowcol_to_a1(self.first_row, self.first_col)
+            if self.first_row == 1:
+                start = start.rstrip('0123456789')
+            end = rowcol_to_a1(1, self.last_col).rstrip('0123456789')
+            return f"{title}!{start}:{end}"
+        return (f"{title}!{rowcol_to_a1(self.first_row, self.first_col)}:"
+                f"{rowcol_to_a1(self.last_row, self.last_col)}")
+
+    def holds(self, row, col):
+        return (self.first_col <= col <= self.last_col and self.first_row <= row
+                and (self.last_row is None or row <= self.last_row))
+
+
+def _runs(numbers):
+    """Consecutive runs of sorted numbers as (first, last) pairs"""
+    runs = []
+    for number in sorted(numbers):
+        if runs and number == runs[-1][1] + 1:
+            runs[-1][1] = number
+        else:
+            runs.append([number, number])
+    return [tuple(run) for run in runs]
+
+
+def plan_ranges(blocks):
+    """Fewest rectangles that cover exactly the cells of ``blocks``
+
+    Cells used by several datasets are fetched once, and columns a
+    dataset skips are never fetched. Columns with the same row runs side
+    by side share one rectangle.
+    """
+    rows_used = defaultdict(lambda: defaultdict(set))  # sheet -> column -> listed rows
+    open_from = defaultdict(dict)                       # sheet -> column -> first open row
+    for block in blocks:
+        for col in block.columns:
+            if block.rows is None:
+                start = open_from[block.sheet].get(col, block.first_row)
+                open_from[block.sheet][col] = min(start, block.first_row)
+            else:
+                rows_used[block.sheet][col].update(block.rows)
+
+    ranges = []
+    for sheet in {**rows_used, **open_from}:
+        columns_by_run = defaultdict(list)
+        for col in set(rows_used[sheet]) | set(open_from[sheet]):
+            start = open_from[sheet].get(col)
+            runs = _runs(row for row in rows_used[sheet][col] if start is None or row < start)
+            if start is not None:
+                runs.append((start, None))
+            for run in runs:
+                columns_by_run[run].append(col)
+        for (first_row, last_row), cols in columns_by_run.items():
+            for first_col, last_col in _runs(cols):
+                ranges.append(Range(sheet, first_row, last_row, first_col, last_col))
+    return sorted(ranges, key=lambda r: (r.sheet, r.first_row, r.first_col))
+
+
+def gather(block, ranges, values):
+    """Rows of ``block`` cut out of fetched ``ranges``
+
+    ``values`` holds the rows returned for each range, trailing blanks
+    trimmed the way the API trims them; the result is trimmed likewise.
+    """
+    if block.rows is None:
+        exact = Range(block.sheet, block.first_row, None, block.columns[0], block.columns[-1])
+        contiguous = True
+    else:
+        exact = Range(block.sheet, block.rows[0], block.rows[-1], block.columns[0], block.columns[-1])
+        contiguous = block.rows == span(block.rows[0], len(block.rows))
+    contiguous = contiguous and block.columns == span(block.columns[0], len(block.columns))
+    if contiguous and exact in ranges:
+        return values[ranges.index(exact)]
+
+    def value(row, col):
+        for fetched, rows in zip(ranges, values):
+            if fetched.sheet == block.sheet and fetched.holds(row, col):
+                r = row - fetched.first_row
+                c = col - fetched.first_col
+                return rows[r][c] if r < len(rows) and c < len(rows[r]) else ''
+        return ''
+
+    sheet_rows = block.rows
+    if sheet_rows is None:
+        # Open-ended: as deep as the deepest open range that covers it
+        last = max((fetched.first_row + len(rows) - 1 for fetched, rows in zip(ranges, values)
+                    if fetched.sheet == block.sheet and fetched.last_row is None), default=0)
+        sheet_rows = tuple(range(block.first_row, last + 1))
+    grid = []
+    for row in sheet_rows:
+        cells = [value(row, col) for col in block.columns]
+        while cells and cells[-1] == '':
+            cells.pop()
+        grid.append(tuple(cells))
+    while grid and not grid[-1]:
+        grid.pop()
+    return tuple(grid)
@@ -0,0 +1,145 @@
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import wraps
+
+# Upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Operations that are a round trip to Google
+API_OPERATIONS = ('token', 'open', 'metadata', 'batchGet')
+
+_collector = contextvars.ContextVar('scoreboard_metrics_collector', default=None)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram"""
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th observation"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(LATENCY_BUCKETS + (float('inf'),), self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+
+class Metrics:
+    """Counters and latency histograms keyed by (dataset, operation)
+
+    The process-wide instance also feeds the collector of the current
+    context, which is how a Streamlit rerun gets numbers of its own.
+    """
+
+    def __init__(self, propagate=True):
+        self.propagate = propagate
+        self._lock = threading.Lock()
+        self.counters = defaultdict(int)      # (name, dataset, operation) -> n
+        self.latency = defaultdict(Histogram)  # (dataset, operation) -> Histogram
+        self.gauges = {}                       # name -> latest value
+
+    def count(self, name, dataset, operation, n=1):
+        with self._lock:
+            self.counters[(name, dataset, operation)] += n
+        collector = _collector.get() if self.propagate else None
+        if collector is not None:
+            collector.count(name, dataset, operation, n)
+
+    def observe(self, dataset, operation, seconds):
+        with self._lock:
+            self.latency[(dataset, operation)].observe(seconds)
+        collector = _collector.get() if self.propagate else None
+        if collector is not None:
+            collector.observe(dataset, operation, seconds)
+
+    def set_gauge(self, name, value):
+        """Record the current value of a level such as a queue depth"""
+        with self._lock:
+            self.gauges[name] = value
+
+    @contextmanager
+    def timed(self, dataset, operation):
+        """Count, time and record failures of the enclosed block"""
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.count('errors', dataset, operation)
+            raise
+        finally:
+            self.count('calls', dataset, operation)
+            self.observe(dataset, operation, time.perf_counter() - started)
+
+    def instrument(self, dataset, operation='view'):
+        """Decorator form of timed()"""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timed(dataset, operation):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def collect(self):
+        """Start a collector for the current context and return it"""
+        collector = Metrics(propagate=False)
+        _collector.set(collector)
+        return collector
+
+    # ----- reporting -----
+    def total(self, name, operations=None):
+        with self._lock:
+            return sum(n for (counter, _, operation), n in self.counters.items()
+                       if counter == name and (operations is None or operation in operations))
+
+    def api_calls(self):
+        """Round trips to Google Sheets"""
+        return self.total('calls', API_OPERATIONS)
+
+    def cache_hit_ratio(self):
+        """Share of snapshot lookups served without waiting on Google"""
+        lookups = ('cache', 'published')
+        hits = self.total('cache_hit', lookups) + self.total('cache_stale', lookups)
+        misses = self.total('cache_miss', lookups)
+        return hits / (hits + misses) if hits + misses else None
+
+    def summary(self):
+        """One row per (dataset, operation) with counts and latency"""
+        with self._lock:
+            keys = {(dataset, operation) for _, dataset, operation in self.counters}
+            keys |= set(self.latency)
+            rows = []
+            for dataset, operation in sorted(keys):
+                histogram = self.latency.get((dataset, operation))
+                row = {'dataset': dataset, 'operation': operation}
+                for name in ('calls', 'errors', 'cache_hit', 'cache_stale', 'cache_miss',
+                             'queued', 'deferred', 'throttled'):
+                    row[name] = self.counters.get((name, dataset, operation), 0)
+                if histogram is not None and histogram.count:
+                    row['mean_ms'] = round(histogram.total / histogram.count * 1000, 1)
+                    row['p95_ms'] = histogram.quantile(0.95) * 1000
+                else:
+                    row['mean_ms'] = row['p95_ms'] = None
+                rows.append(row)
+        return rows
+
+
+# Process-wide metrics, shared by every session and background thread
+metrics = Metrics()
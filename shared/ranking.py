@@ -0,0 +1,247 @@
+import bisect
+import math
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from itertools import count, islice
+from typing import Optional
+
+import pandas as pd
+from sortedcontainers import SortedList
+
+from shared.layout import TEAMS
+
+# Students the kiosk and the LED wall rank
+TOP_STUDENTS = 5
+
+
+@dataclass(frozen=True)
+class PointEvent:
+    """Points given to a team, and to one of its students when ``student`` is set"""
+    team: str
+    student: Optional[str]
+    delta: float
+    source: str
+    timestamp: float  # Seconds since the epoch
+
+
+class StudentScores:
+    """Point totals per student from the month achievement sheets
+
+    Students are keyed by ITS ID, found through the roster by name;
+    achievement names missing from the roster are keyed by the name
+    itself. Each month's totals are remembered with the version they
+    came from, so a changed month only applies its differences.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.roster_version = None
+        self.totals = {}       # key -> points over every month applied
+        self.students = {}     # key -> (name, team)
+        self.ids = set()       # keys that are ITS IDs
+        self.versions = {}     # month -> version of the totals applied
+        self._months = {}      # month -> {key: points}
+        self._keys = {}        # folded name -> ITS ID
+        self.order = []        # ITS IDs in roster order
+
+    def set_roster(self, roster, version=None):
+        """Key students by the ITS IDs of ``roster``; a new roster starts over"""
+        if version is not None and version == self.roster_version:
+            return False
+        self._reset()
+        self.roster_version = version
+        for name, its, team in zip(roster['name'], roster['its'], roster['team']):
+            folded = str(name).strip().casefold()
+            its = str(its).strip()
+            if not folded or not its or folded in self._keys:
+                continue  # Unnamed, no ITS, or a repeated name: first row wins
+            self._keys[folded] = its
+            self.ids.add(its)
+            self.students[its] = (str(name).strip(), team)
+            self.order.append(its)
+        return True
+
+    def key(self, name):
+        name = str(name).strip()
+        return self._keys.get(name.casefold(), name)
+
+    def update_month(self, month, version, achievements):
+        """Apply the differences between ``achievements`` and the month as last applied"""
+        if self.versions.get(month) == version and month in self._months:
+            return
+        totals = {}
+        if not achievements.empty:
+            points = achievements['points'].fillna(0.0)
+            for name, team, value in zip(achievements['student'], achievements['team'], points):
+                key = self.key(name)
+                totals[key] = totals.get(key, 0.0) + float(value)
+                if key not in self.students:
+                    self.students[key] = (str(name).strip(), team)
+        previous = self._months.get(month, {})
+        for key in previous.keys() | totals.keys():
+            self.add(key, totals.get(key, 0.0) - previous.get(key, 0.0))
+        self._months[month] = totals
+        self.versions[month] = version
+
+    def drop_month(self, month):
+        for key, points in self._months.pop(month, {}).items():
+            self.add(key, -points)
+        self.versions.pop(month, None)
+
+    def add(self, key, points):
+        if points:
+            self.totals[key] = self.totals.get(key, 0.0) + points
+
+
+# ========== LEADERBOARD ==========
+def _same(a, b):
+    return a == b or (a != a and b != b)  # NaN equals NaN here
+
+
+class Standings:
+    """Scores of one kind of entrant, kept in rank order
+
+    Updates and rank lookups are O(log n). Equal scores share a rank and
+    the next rank skips (1, 2, 2, 4); within a tie entrants list in
+    ``order``, then in order of arrival. Unreadable (NaN) scores rank last.
+    """
+
+    def __init__(self, order=()):
+        self.scores = {}
+        self._position = {key: n for n, key in enumerate(order)}
+        self._ranked = SortedList()  # (-score, position, key), best first
+
+    def __len__(self):
+        return len(self.scores)
+
+    def __contains__(self, key):
+        return key in self.scores
+
+    def _entry(self, key, score):
+        position = self._position.setdefault(key, len(self._position))
+        return (math.inf if math.isnan(score) else -score, position, key)
+
+    def set(self, key, score):
+        if key in self.scores:
+            if _same(self.scores[key], score):
+                return
+            self._ranked.remove(self._entry(key, self.scores[key]))
+        self.scores[key] = score
+        self._ranked.add(self._entry(key, score))
+
+    def add(self, key, delta):
+        self.set(key, self.scores.get(key, 0.0) + delta)
+
+    def discard(self, key):
+        if key in self.scores:
+            self._ranked.remove(self._entry(key, self.scores.pop(key)))
+
+    def rank(self, key):
+        """1 + the number of entrants strictly ahead; None if unknown"""
+        if key not in self.scores:
+            return None
+        return self._ranked.bisect_left(self._entry(key, self.scores[key])[:1]) + 1
+
+    def ranked(self, n=None):
+        """``(rank, key, score)`` of the first ``n`` entrants, best first"""
+        rank, previous = 0, None
+        for position, (order, _, key) in enumerate(islice(self._ranked, n)):
+            if order != previous:
+                rank, previous = position + 1, order
+            yield rank, key, self.scores[key]
+
+
+class Leaderboard:
+    """Team and student standings: base totals plus the point events since
+
+    A base is the totals of one kind as of a time, e.g. the team sheet
+    as of its fetch. Events up to that time are taken to be in the base;
+    later ones are applied on top, so a new base replaces what the sheet
+    has caught up with and keeps the rest. Only entrants whose score
+    changes are moved, each in O(log n).
+    """
+
+    KINDS = ('teams', 'students')
+
+    def __init__(self, teams=TEAMS, students=()):
+        self.teams = Standings(teams)
+        self.students = Standings(students)
+        self.student_teams = {}
+        self.bases = {kind: ({}, None) for kind in self.KINDS}  # kind -> (totals, as_of)
+        self.events = []  # (timestamp, n, event) applied on top of a base, oldest first
+        self._sequence = count()
+        self.last_event_id = 0
+        self.lock = threading.Lock()
+
+    @classmethod
+    def rebuild(cls, bases, events, teams=TEAMS, students=()):
+        """Standings from ``{kind: (totals, as_of)}`` plus a log of events"""
+        leaderboard = cls(teams, students)
+        for kind, (totals, as_of) in bases.items():
+            leaderboard.set_base(kind, totals, as_of)
+        for event in events:
+            leaderboard.apply(event)
+        return leaderboard
+
+    def _standings(self, kind):
+        return self.teams if kind == 'teams' else self.students
+
+    def _counts(self, kind, event):
+        as_of = self.bases[kind][1]
+        if kind == 'students' and event.student is None:
+            return False
+        return as_of is None or event.timestamp > as_of
+
+    def _event_key(self, kind, event):
+        return event.team if kind == 'teams' else event.student
+
+    def set_base(self, kind, totals, as_of=None):
+        """Make ``totals`` the base of ``kind``; events up to ``as_of`` are in it"""
+        previous, _ = self.bases[kind]
+        self.bases[kind] = (dict(totals), as_of)
+        overlay = defaultdict(float)
+        for _, _, event in self.events:
+            if self._counts(kind, event):
+                overlay[self._event_key(kind, event)] += event.delta
+
+        standings = self._standings(kind)
+        # New totals first and in their order, which is the order ties list in
+        keys = list(totals) + [key for key in {**previous, **overlay, **standings.scores} if key not in totals]
+        for key in keys:
+            if key in totals or key in overlay:
+                standings.set(key, totals.get(key, 0.0) + overlay.get(key, 0.0))
+            else:
+                standings.discard(key)
+        self._forget_applied()
+
+    def apply(self, event, event_id=None):
+        """Add one event's points to the standings it counts for"""
+        if event_id is not None:
+            self.last_event_id = max(self.last_event_id, event_id)
+        bisect.insort(self.events, (event.timestamp, next(self._sequence), event))
+        for kind in self.KINDS:
+            if self._counts(kind, event):
+                self._standings(kind).add(self._event_key(kind, event), event.delta)
+        if event.student is not None:
+            self.student_teams[event.student] = event.team
+
+    def _forget_applied(self):
+        # Events every base has caught up with can no longer change anything
+        as_of = [as_of for _, as_of in self.bases.values()]
+        if None not in as_of:
+            del self.events[:bisect.bisect_right(self.events, (min(as_of), math.inf))]
+
+    def team_rank(self, team):
+        return self.teams.rank(team)
+
+    def student_rank(self, student):
+        return self.students.rank(student)
+
+    def team_table(self):
+        """Teams in rank order as a (team, points, rank) frame"""
+        rows = [(team, points, rank) for rank, team, points in self.teams.ranked()]
+        return pd.DataFrame(rows, columns=['team', 'points', 'rank'])
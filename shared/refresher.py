@@ -0,0 +1,202 @@
+import os
+import threading
+import time
+
+from shared.data_loader import (
+    MONTH_SHEETS, fetch_snapshot, load_shared_snapshot, publish_snapshot, published_snapshot,
+    stored_updates,
+)
+from shared.ingest import IngestServer, ingest_enabled
+from shared.layout import LAYOUT
+
+# Seconds between polls, 0 turns the refresher off
+REFRESH_INTERVAL = float(os.environ.get("SCOREBOARD_REFRESH_INTERVAL", "30"))
+
+# With change notifications on, polls are only a safety net for missed ones
+SAFETY_INTERVAL = float(os.environ.get("SCOREBOARD_SAFETY_INTERVAL", "600"))
+
+# Seconds between looks at the shared store for rows another process fetched
+SYNC_SECONDS = 2
+
+# Notifications this close together are fetched in one read
+NOTIFY_DEBOUNCE_SECONDS = 1
+
+
+class SnapshotRefresher:
+    """Daemon thread that polls the spreadsheet and publishes each snapshot
+
+    Readers in ``shared.data_loader`` pick up the published snapshot
+    instead of fetching, so no page render waits on Google. A failed poll
+    keeps the previous snapshot published and is retried next interval.
+    Polls go through the shared store, so running the refresher in every
+    kiosk process still costs one fetch per interval.
+
+    With ``follow`` on, change notifications (see shared.ingest) refresh
+    just the datasets an edit touched, and rows other processes saved
+    are folded in every few seconds from the store.
+    """
+
+    def __init__(self, interval=REFRESH_INTERVAL, datasets=None, months=MONTH_SHEETS, follow=False):
+        self.interval = interval
+        self.datasets = datasets
+        self.months = tuple(months)
+        self.follow = follow
+        self.ingest = None
+        self.last_success = None
+        self.last_error = None
+        self._pending = (set(), set())  # datasets, months waiting for a targeted refresh
+        self._pending_lock = threading.Lock()
+        self._seen = {}                  # key -> fetch time folded into the published snapshot
+        self._wake = threading.Event()
+        self._force = False
+        self._stop = threading.Event()
+        self._refreshed = threading.Condition()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="scoreboard-refresher", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self.ingest is not None:
+            self.ingest.stop()
+            self.ingest = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def refresh_now(self, wait=False, timeout=30):
+        """Fetch from Google immediately instead of at the next tick"""
+        with self._refreshed:
+            self._force = True
+            self._wake.set()
+            if wait:
+                self._refreshed.wait(timeout)
+
+    def refresh_once(self, force=False):
+        """Fetch and publish one snapshot; False if the fetch failed"""
+        try:
+            if force:
+                snapshot = fetch_snapshot(self.datasets, self.months)
+            else:
+                # Refreshers in other processes on this host share one fetch per interval
+                snapshot = load_shared_snapshot(self.datasets, self.months, self.interval)
+            publish_snapshot(snapshot)
+            self._seen = {key: snapshot.fetched_at_of([key]).timestamp() for key in snapshot.values}
+            self.last_success = time.time()
+            self.last_error = None
+            return True
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"Scoreboard refresh failed, keeping last snapshot: {e}")
+            return False
+        finally:
+            with self._refreshed:
+                self._refreshed.notify_all()
+
+    def notify(self, datasets=(), months=()):
+        """Refresh ``datasets`` and ``months`` soon, leaving the rest as they are"""
+        wanted = LAYOUT if self.datasets is None else self.datasets
+        with self._pending_lock:
+            self._pending[0].update(key for key in datasets if key in wanted)
+            self._pending[1].update(month for month in months if month in self.months)
+            if not any(self._pending):
+                return
+        self._wake.set()
+
+    def _take_pending(self):
+        with self._pending_lock:
+            datasets, months = self._pending
+            self._pending = (set(), set())
+        return sorted(datasets), sorted(months)
+
+    def refresh_changed(self):
+        """Fetch only what notifications asked for and fold it into the published snapshot"""
+        datasets, months = self._take_pending()
+        if not datasets and not months:
+            return False
+        try:
+            changed = fetch_snapshot(datasets, months)
+        except Exception as e:
+            # The next safety poll fetches everything anyway
+            print(f"Targeted refresh of {', '.join(datasets + months)} failed: {e}")
+            return False
+        self._fold(changed)
+        return True
+
+    def sync_from_store(self):
+        """Fold in rows another process fetched and saved, without an API read"""
+        published = published_snapshot()
+        if published is None:
+            return False
+        try:
+            changed = stored_updates(published, self._seen)
+        except Exception as e:
+            print(f"Error reading shared snapshot updates: {e}")
+            return False
+        if changed is None:
+            return False
+        self._fold(changed)
+        return True
+
+    def _fold(self, changed):
+        published = published_snapshot()
+        publish_snapshot(published.merged(changed) if published is not None else changed)
+        self._seen.update(
+            (key, max(self._seen.get(key, 0), changed.fetched_at_of([key]).timestamp()))
+            for key in changed.values
+        )
+        with self._refreshed:
+            self._refreshed.notify_all()
+
+    def _run(self):
+        next_poll = 0.0
+        while not self._stop.is_set():
+            force, self._force = self._force, False
+            if force or time.monotonic() >= next_poll:
+                self._take_pending()  # A full poll covers them
+                self.refresh_once(force)
+                next_poll = time.monotonic() + self.interval
+                if self.follow and self.ingest is None:
+                    # Whoever served notifications may have exited; take over
+                    self.ingest = IngestServer(self.notify).start()
+            elif any(self._pending):
+                self._stop.wait(NOTIFY_DEBOUNCE_SECONDS)
+                self.refresh_changed()
+            elif self.follow:
+                self.sync_from_store()
+            wait = max(next_poll - time.monotonic(), 0)
+            self._wake.wait(min(wait, SYNC_SECONDS) if self.follow else wait)
+            self._wake.clear()
+
+
+_refresher = None
+_refresher_lock = threading.Lock()
+
+
+def start_refresher(interval=REFRESH_INTERVAL):
+    """Start the process-wide refresher once; None when it is disabled"""
+    global _refresher
+    if interval <= 0:
+        return None
+    with _refresher_lock:
+        if _refresher is None:
+            if ingest_enabled():
+                _refresher = SnapshotRefresher(max(interval, SAFETY_INTERVAL), follow=True)
+            else:
+                _refresher = SnapshotRefresher(interval)
+        return _refresher.start()
+
+
+def get_refresher():
+    """The running refresher, if start_refresher() was called"""
+    return _refresher
+
@@ -0,0 +1,47 @@
+import threading
+from collections import OrderedDict
+
+from shared.metrics import metrics
+
+# Figures, tables and exports kept across reruns and sessions
+RENDER_CACHE_SIZE = 64
+
+
+class RenderCache:
+    """Bounded cache of artifacts derived from a dataset version
+
+    An entry is keyed by the artifact's name, the version of the data it
+    was built from (e.g. Envelope.version) and the view options, so a
+    rerun with unchanged data reuses it and new data simply misses.
+    Least recently used entries go first. Cached values are shared
+    between sessions and must not be modified.
+    """
+
+    def __init__(self, max_entries=RENDER_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # (name, version, options) -> value
+
+    def get(self, name, version, build, **options):
+        """Cached artifact, calling ``build()`` when there is none"""
+        key = (name, version, tuple(sorted(options.items())))
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                metrics.count('cache_hit', name, 'render')
+                return self._entries[key]
+        metrics.count('cache_miss', name, 'render')
+        value = build()
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+render_cache = RenderCache()
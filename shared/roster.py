@@ -0,0 +1,85 @@
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Columns the student table can be sorted by; grade and ITS sort as numbers
+SORT_COLUMNS = ('name', 'team', 'gender', 'grade', 'its')
+NUMERIC_COLUMNS = ('grade', 'its')
+
+PAGE_SIZES = (25, 50, 100, 250)
+
+# Filter and sort combinations whose row order is kept per table
+QUERY_CACHE_SIZE = 64
+
+
+class StudentTable:
+    """Roster prepared once per data version for paged views
+
+    Sort orders are computed once per column and filters are vectorized
+    comparisons over the prepared columns, so a page costs the same
+    whatever the roster size and only that page leaves the server.
+    """
+
+    def __init__(self, frame, version=None):
+        self.version = version
+        self.frame = frame.reset_index(drop=True)
+        self._columns = {
+            name: self.frame[name].astype(str).to_numpy(dtype=object)
+            for name in ('team', 'gender', 'grade')
+        }
+        self._folded_names = self.frame['name'].astype(str).str.strip().str.casefold()
+        self._orders = {}
+        self._queries = OrderedDict()
+
+    def __len__(self):
+        return len(self.frame)
+
+    def options(self, column):
+        """Distinct non-blank values of ``column``, sorted"""
+        values = self.frame[column].astype(str)
+        values = values[values.str.strip() != ''].unique().tolist()
+        if column in NUMERIC_COLUMNS:
+            return sorted(values, key=lambda value: (pd.to_numeric(value, errors='coerce'), value))
+        return sorted(values)
+
+    def _order(self, column):
+        if column not in self._orders:
+            text = self.frame[column].astype(str).to_numpy(dtype=object)
+            if column in NUMERIC_COLUMNS:
+                # Numbers first in numeric order, then anything else as text
+                numbers = pd.to_numeric(self.frame[column], errors='coerce').to_numpy(dtype=float)
+                self._orders[column] = np.lexsort((text, np.nan_to_num(numbers, nan=np.inf)))
+            else:
+                self._orders[column] = np.argsort(text, kind='stable')
+        return self._orders[column]
+
+    def query(self, team=None, gender=None, grade=None, prefix='', sort='name', descending=False):
+        """Row positions passing the filters, in display order"""
+        key = (team, gender, grade, prefix.strip().casefold(), sort, descending)
+        if key in self._queries:
+            self._queries.move_to_end(key)
+            return self._queries[key]
+
+        mask = np.ones(len(self.frame), dtype=bool)
+        for column, wanted in (('team', team), ('gender', gender), ('grade', grade)):
+            if wanted is not None:
+                mask &= self._columns[column] == wanted
+        if key[3]:
+            mask &= self._folded_names.str.startswith(key[3]).to_numpy(dtype=bool)
+
+        order = self._order(sort if sort in SORT_COLUMNS else 'name')
+        if descending:
+            order = order[::-1]
+        positions = order[mask[order]]
+
+        self._queries[key] = positions
+        if len(self._queries) > QUERY_CACHE_SIZE:
+            self._queries.popitem(last=False)
+        return positions
+
+    def page(self, number, size, **filters):
+        """``(rows, total)``: page ``number`` (from 1) of the filtered table"""
+        positions = self.query(**filters)
+        start = (max(number, 1) - 1) * size
+        return self.frame.take(positions[start:start + size]), len(positions)
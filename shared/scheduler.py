@@ -0,0 +1,122 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from shared.metrics import metrics
+
+# Sheets allows 60 reads per minute per user; a service account is one user
+READ_QUOTA_PER_MINUTE = float(os.environ.get("SCOREBOARD_READ_QUOTA", "60"))
+READ_BURST = 10
+
+# Lower runs first: kiosk standings, then roster/weekly, then month sheets
+PRIORITY_TEAMS = 0
+PRIORITY_CORE = 1
+PRIORITY_ACHIEVEMENTS = 2
+
+# Longest a read of each priority queues before it is deferred
+PRIORITY_TIMEOUTS = {
+    PRIORITY_TEAMS: 30,
+    PRIORITY_CORE: 15,
+    PRIORITY_ACHIEVEMENTS: 5,
+}
+
+# Pause after a 429 that carries no Retry-After header
+THROTTLE_SECONDS = 10
+
+
+class ReadDeferred(Exception):
+    """A read waited longer than its priority allows for quota"""
+
+
+class ReadScheduler:
+    """Token bucket sized to the Sheets read quota, served by priority
+
+    Reads queue in priority order and only the head of the queue may
+    take a token, so month sheets never starve the kiosk's team totals.
+    A read still queued after its priority's timeout raises ReadDeferred
+    and the caller serves its cached copy instead. A 429 from Google
+    empties the bucket and pauses every read for the Retry-After time.
+    """
+
+    def __init__(self, rate_per_minute=READ_QUOTA_PER_MINUTE, burst=READ_BURST):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._waiters = []  # heap of (priority, sequence)
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+
+    def _refill(self, now):
+        if now >= self._paused_until:
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _publish_gauges(self):
+        metrics.set_gauge('read_queue_depth', len(self._waiters))
+        metrics.set_gauge('read_tokens', round(self._tokens, 2))
+
+    def acquire(self, priority, timeout):
+        """Take one read token; False if none came within ``timeout``"""
+        entry = (priority, next(self._sequence))
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            heapq.heappush(self._waiters, entry)
+            self._publish_gauges()
+            queued = False
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if self._waiters[0] == entry and self._tokens >= 1 and now >= self._paused_until:
+                        self._tokens -= 1
+                        return True
+                    if not queued:
+                        queued = True
+                        metrics.count('queued', f"priority {priority}", 'scheduler')
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        return False
+                    if now < self._paused_until:
+                        wait = self._paused_until - now
+                    elif self._tokens < 1:
+                        wait = (1 - self._tokens) / self.rate
+                    else:
+                        wait = remaining  # Woken when the waiter ahead leaves
+                    self._condition.wait(min(remaining, max(wait, 0.005)))
+            finally:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._publish_gauges()
+                self._condition.notify_all()
+
+    @contextmanager
+    def read(self, label, priority):
+        """Run the enclosed Sheets read once quota allows it"""
+        if not self.acquire(priority, PRIORITY_TIMEOUTS.get(priority, 15)):
+            metrics.count('deferred', label, 'scheduler')
+            raise ReadDeferred(f"{label} read deferred, Sheets read quota is exhausted")
+        yield
+
+    def throttle(self, label, seconds=None):
+        """Google answered 429: stop all reads for a while"""
+        metrics.count('throttled', label, 'scheduler')
+        with self._condition:
+            self._tokens = 0.0
+            self._paused_until = max(self._paused_until,
+                                     time.monotonic() + (seconds or THROTTLE_SECONDS))
+            self._publish_gauges()
+            self._condition.notify_all()
+
+    @property
+    def queue_depth(self):
+        with self._condition:
+            return len(self._waiters)
+
+
+# Process-wide scheduler in front of every Sheets read
+read_scheduler = ReadScheduler()
@@ -0,0 +1,393 @@
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+import requests
+
+SHEETS_API_ORIGIN = "https://sheets.googleapis.com"
+
+_A1_CELL = re.compile(r"^([A-Za-z]*)(\d*)$")
+_WHOLE_NUMBER = re.compile(r"-?\d{1,3}(,\d{3})*|-?\d+")
+
+
+# ========== CLIENT SIDE ==========
+class StandInSession(requests.Session):
+    """requests session that sends Sheets API calls to a local stand-in
+
+    Passed to ``gspread.authorize(None, session=...)`` so gspread itself
+    is unchanged and no Google credentials are needed.
+    """
+
+    def __init__(self, base_url):
+        super().__init__()
+        self.base_url = base_url.rstrip("/")
+
+    def request(self, method, url, *args, **kwargs):
+        if url.startswith(SHEETS_API_ORIGIN):
+            url = self.base_url + url[len(SHEETS_API_ORIGIN):]
+        return super().request(method, url, *args, **kwargs)
+
+
+# ========== A1 RANGES ==========
+def _column_index(letters):
+    index = 0
+    for letter in letters.upper():
+        index = index * 26 + ord(letter) - ord("A") + 1
+    return index - 1
+
+
+def parse_a1(a1_range):
+    """``(title, first_row, first_col, last_row, last_col)``, 0-based
+
+    Open ends such as ``A:H`` or a bare sheet title give None bounds.
+    """
+    if "!" in a1_range:
+        title, cells = a1_range.rsplit("!", 1)
+    else:
+        title, cells = a1_range, ""
+    if title.startswith("'") and title.endswith("'"):
+        title = title[1:-1].replace("''", "'")
+    if not cells:
+        return title, None, None, None, None
+
+    start, _, end = cells.partition(":")
+    end = end or start
+    bounds = []
+    for cell in (start, end):
+        match = _A1_CELL.match(cell)
+        if match is None:
+            raise ValueError(f"Unable to parse range: {a1_range}")
+        letters, digits = match.groups()
+        bounds.append((int(digits) - 1 if digits else None,
+                       _column_index(letters) if letters else None))
+    (first_row, first_col), (last_row, last_col) = bounds
+    return title, first_row, first_col, last_row, last_col
+
+
+def slice_values(rows, first_row, first_col, last_row, last_col):
+    """Rows of a range the way the API returns them, trailing blanks trimmed"""
+    first_row = first_row or 0
+    first_col = first_col or 0
+    stop_row = None if last_row is None else last_row + 1
+    stop_col = None if last_col is None else last_col + 1
+
+    result = [list(row[first_col:stop_col]) for row in rows[first_row:stop_row]]
+    for row in result:
+        while row and row[-1] in ("", None):
+            row.pop()
+    while result and not result[-1]:
+        result.pop()
+    return result
+
+
+# ========== SERVER ==========
+class SheetsStandIn:
+    """In-memory spreadsheet behind a subset of the Sheets v4 REST API
+
+    Serves spreadsheet metadata, ``values/<range>`` and
+    ``values:batchGet`` from a fixture, with optional added latency,
+    random 429 responses and a per-minute read quota. ``edit()`` (or
+    ``POST /_standin/edit``) changes a cell and, given ``notify_url``,
+    posts the change notification an Apps Script trigger would.
+    """
+
+    def __init__(self, fixture, latency=0.0, jitter=0.0, error_rate=0.0, read_quota=None,
+                 notify_url=None, notify_secret=""):
+        self.fixture = fixture
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.read_quota = read_quota
+        self.notify_url = notify_url
+        self.notify_secret = notify_secret
+        self.stats = Counter()
+        self._reads = deque()
+        self._lock = threading.Lock()
+
+    def sheet_rows(self, title, render="FORMATTED_VALUE"):
+        if render != "FORMATTED_VALUE":
+            unformatted = self.fixture.get("unformatted", {})
+            if title in unformatted:
+                return unformatted[title]
+        return self.fixture["sheets"][title]
+
+    def metadata(self, spreadsheet_id):
+        sheets = []
+        for index, (title, rows) in enumerate(self.fixture["sheets"].items()):
+            sheets.append({"properties": {
+                "sheetId": index,
+                "title": title,
+                "index": index,
+                "sheetType": "GRID",
+                "gridProperties": {
+                    "rowCount": max(len(rows), 1000),
+                    "columnCount": max([len(row) for row in rows] + [26]),
+                },
+            }})
+        return {
+            "spreadsheetId": spreadsheet_id,
+            "properties": {"title": self.fixture.get("title", "Stand-in"), "locale": "en_US",
+                           "timeZone": "Etc/GMT"},
+            "sheets": sheets,
+        }
+
+    def edit(self, a1_cell, value):
+        """Set one cell, e.g. ``edit("'OFFICE WORKING'!D48", "1,234")``, and notify"""
+        title, row, col, _, _ = parse_a1(a1_cell)
+        if title not in self.fixture["sheets"] or row is None or col is None:
+            raise KeyError(a1_cell)
+        value = str(value)
+        typed = int(value.replace(",", "")) if _WHOLE_NUMBER.fullmatch(value) else value
+        with self._lock:
+            for target, cell in (("sheets", value), ("unformatted", typed)):
+                rows = self.fixture.get(target, {}).get(title)
+                if rows is None:
+                    continue
+                while len(rows) <= row:
+                    rows.append([])
+                rows[row].extend([""] * (col + 1 - len(rows[row])))
+                rows[row][col] = cell
+            self.stats["edits"] += 1
+        if self.notify_url:
+            a1 = a1_cell.rsplit("!", 1)[1]
+            try:
+                response = requests.post(self.notify_url, json={"sheet": title, "range": a1},
+                                         headers={"X-Scoreboard-Secret": self.notify_secret}, timeout=5)
+                self.record(f"notify {response.status_code}")
+            except requests.RequestException:
+                self.record("notify failed")
+
+    def value_range(self, a1_range, render):
+        title, *bounds = parse_a1(a1_range)
+        if title not in self.fixture["sheets"]:
+            raise KeyError(a1_range)
+        result = {"range": a1_range, "majorDimension": "ROWS"}
+        values = slice_values(self.sheet_rows(title, render), *bounds)
+        if values:
+            result["values"] = values
+        return result
+
+    def admit(self):
+        """Simulated network delay, then None or an injected error status"""
+        delay = self.latency + random.uniform(0, self.jitter) if self.jitter else self.latency
+        if delay:
+            time.sleep(delay)
+        if self.error_rate and random.random() < self.error_rate:
+            return 429
+        if self.read_quota:
+            with self._lock:
+                now = time.monotonic()
+                while self._reads and now - self._reads[0] > 60:
+                    self._reads.popleft()
+                if len(self._reads) >= self.read_quota:
+                    return 429
+                self._reads.append(now)
+        return None
+
+    def record(self, kind):
+        with self._lock:
+            self.stats[kind] += 1
+
+    def handler(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def send_json(self, status, body):
+                data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=UTF-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def send_error_json(self, status, message, reason):
+                self.send_json(status, {"error": {"code": status, "message": message, "status": reason}})
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                render = query.get("valueRenderOption", ["FORMATTED_VALUE"])[0]
+
+                if url.path == "/_standin/stats":
+                    with standin._lock:
+                        return self.send_json(200, dict(standin.stats))
+
+                match = re.match(r"^/v4/spreadsheets/([^/:]+)(.*)$", url.path)
+                if match is None:
+                    return self.send_error_json(404, "Not found", "NOT_FOUND")
+                spreadsheet_id, rest = match.groups()
+
+                if rest == "":
+                    kind = "metadata"
+                elif rest == "/values:batchGet":
+                    kind = "batchGet"
+                elif rest.startswith("/values/"):
+                    kind = "values.get"
+                else:
+                    return self.send_error_json(404, "Not found", "NOT_FOUND")
+
+                standin.record(kind)
+                status = standin.admit()
+                if status is not None:
+                    standin.record("throttled")
+                    return self.send_error_json(
+                        status, "Quota exceeded for quota metric 'Read requests'", "RESOURCE_EXHAUSTED")
+
+                try:
+                    if kind == "metadata":
+                        return self.send_json(200, standin.metadata(spreadsheet_id))
+                    if kind == "batchGet":
+                        ranges = query.get("ranges", [])
+                        return self.send_json(200, {
+                            "spreadsheetId": spreadsheet_id,
+                            "valueRanges": [standin.value_range(r, render) for r in ranges],
+                        })
+                    a1_range = unquote(rest[len("/values/"):])
+                    return self.send_json(200, standin.value_range(a1_range, render))
+                except (KeyError, ValueError) as e:
+                    return self.send_error_json(400, f"Unable to parse range: {e}", "INVALID_ARGUMENT")
+
+            def do_POST(self):
+                if urlparse(self.path).path != "/_standin/edit":
+                    return self.send_error_json(404, "Not found", "NOT_FOUND")
+                try:
+                    body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)))
+                    standin.edit(body["range"], body["value"])
+                except (KeyError, ValueError, TypeError) as e:
+                    return self.send_error_json(400, f"Unable to edit: {e}", "INVALID_ARGUMENT")
+                return self.send_json(200, {"updatedRange": body["range"]})
+
+        return Handler
+
+    def serve(self, host="127.0.0.1", port=8765):
+        """Blocking HTTP server"""
+        server = ThreadingHTTPServer((host, port), self.handler())
+        server.daemon_threads = True
+        return server
+
+    def start(self, host="127.0.0.1", port=0):
+        """Serve from a daemon thread; returns ``(server, base_url)``"""
+        server = self.serve(host, port)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server, f"http://{host}:{server.server_address[1]}"
+
+
+# ========== FIXTURES ==========
+def load_fixture(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_fixture(fixture, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(fixture, f, ensure_ascii=False)
+
+
+def record_fixture(sheet):
+    """Copy every worksheet of an opened gspread spreadsheet into a fixture"""
+    titles = [ws.title for ws in sheet.worksheets()]
+    ranges = ["'{}'".format(title.replace("'", "''")) for title in titles]
+    fixture = {"title": sheet.title, "sheets": {}, "unformatted": {}}
+    for render, target in (("FORMATTED_VALUE", "sheets"), ("UNFORMATTED_VALUE", "unformatted")):
+        response = sheet.values_batch_get(ranges, params={"valueRenderOption": render})
+        for title, value_range in zip(titles, response.get("valueRanges", [])):
+            fixture[target][title] = value_range.get("values", [])
+    return fixture
+
+
+def synthetic_fixture(months=("JAN",), students=40, rows_per_section=4, seed=0):
+    """Fixture with the scoreboard's sheet layout filled with made-up data"""
+    rng = random.Random(seed)
+    teams = ["الشمس", "القمر", "الزهرة", "المشتري"]
+
+    office = [[""] * 25 for _ in range(51)]
+    for i in range(students):
+        office[3 + i][:8] = [str(i + 1), f"G{i % 5 + 1}", teams[i % 4], f"Student {i + 1}",
+                             str(30000000 + i), str(rng.randint(1, 12)), "MF"[i % 2], f"EQ{i + 1}"]
+    for t in range(4):
+        office[47 + t][3] = f"{rng.randint(400, 900):,}"
+        for col in (8, 12, 16, 20, 24):
+            office[47 + t][col] = str(rng.randint(10, 40))
+
+    weekly = [[""] * 4 for _ in range(5)]
+    for week in range(5):
+        weekly.append([str(rng.randint(10, 700 if week == 0 else 40)) for _ in range(4)])
+
+    sheets = {"OFFICE WORKING": office, "Points Table Monthly": weekly}
+    sections = ["Nihāʾī Ikhtibār", "Sub Sanawāt Ikhtibār", "Marhala Ikhtibār",
+                "Monthly Jadīd Target Achievers", "Student of the Week Achievers",
+                "Other Activities / Points"]
+    for month in months:
+        rows = []
+        for section in sections:
+            rows.append([section])
+            rows.append(["SUN", "Points", "MOON", "Points", "VENUS", "Points", "JUPITER", "Points"])
+            for _ in range(rows_per_section):
+                row = []
+                for _ in teams:
+                    row += [f"Student {rng.randint(1, students)}", str(rng.choice([5, 10, 15]))]
+                rows.append(row)
+            rows.append([])
+        rows.append(["Total points"])
+        sheets[month] = rows
+
+    # What UNFORMATTED_VALUE reads return: numbers typed, the rest as shown
+    unformatted = {
+        title: [[int(cell.replace(",", "")) if _WHOLE_NUMBER.fullmatch(cell) else cell for cell in row]
+                for row in rows]
+        for title, rows in sheets.items()
+    }
+    return {"title": "Synthetic scoreboard", "sheets": sheets, "unformatted": unformatted}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Google Sheets stand-in")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="replay a fixture over HTTP")
+    serve.add_argument("fixture")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.add_argument("--latency", type=float, default=0.0, help="seconds added per request")
+    serve.add_argument("--jitter", type=float, default=0.0, help="random extra seconds")
+    serve.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered 429")
+    serve.add_argument("--read-quota", type=int, default=None, help="reads allowed per minute")
+    serve.add_argument("--notify-url", default=None, help="ingest endpoint to tell about edits")
+    serve.add_argument("--notify-secret", default="", help="shared secret of the ingest endpoint")
+
+    record = commands.add_parser("record", help="copy the live spreadsheet into a fixture")
+    record.add_argument("fixture")
+
+    synth = commands.add_parser("synthesize", help="write a made-up fixture")
+    synth.add_argument("fixture")
+    synth.add_argument("--months", default="JAN")
+    synth.add_argument("--students", type=int, default=40)
+    synth.add_argument("--rows-per-section", type=int, default=4)
+
+    args = parser.parse_args()
+    if args.command == "serve":
+        standin = SheetsStandIn(load_fixture(args.fixture), args.latency, args.jitter,
+                                args.error_rate, args.read_quota, args.notify_url, args.notify_secret)
+        server = standin.serve(args.host, args.port)
+        print(f"Sheets stand-in on http://{args.host}:{args.port} "
+              f"(set SHEETS_API_URL to point the loader at it)")
+        server.serve_forever()
+    elif args.command == "record":
+        from shared.data_loader import get_google_sheet
+        save_fixture(record_fixture(get_google_sheet()), args.fixture)
+    else:
+        fixture = synthetic_fixture(args.months.split(","), args.students, args.rows_per_section)
+        save_fixture(fixture, args.fixture)
+
+
+if __name__ == "__main__":
+    main()
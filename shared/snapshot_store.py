@@ -0,0 +1,205 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+# Local file holding the last good copy of every dataset
+STORE_PATH = os.environ.get(
+    "SCOREBOARD_STORE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                 ".scoreboard", "snapshots.sqlite3")
+)
+
+# Point events are kept this long, well past the fetch that supersedes them
+EVENT_RETENTION_SECONDS = 7 * 24 * 3600
+
+
+class SnapshotStore:
+    """SQLite copy of the latest fetched rows of each dataset
+
+    Every dataset keeps its own fetch time, so a snapshot assembled from
+    the store reports the age of its oldest part rather than the time it
+    was read back.
+    """
+
+    def __init__(self, path=STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._ready = False
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=10)
+        if not self._ready:
+            with self._lock:
+                if not self._ready:
+                    connection.execute("PRAGMA journal_mode=WAL")
+                    connection.executescript("""
+                        CREATE TABLE IF NOT EXISTS datasets (
+                            key TEXT PRIMARY KEY,
+                            rows TEXT NOT NULL,
+                            fetched_at REAL NOT NULL
+                        );
+                        CREATE TABLE IF NOT EXISTS sheet_titles (
+                            id INTEGER PRIMARY KEY CHECK (id = 1),
+                            titles TEXT NOT NULL,
+                            fetched_at REAL NOT NULL
+                        );
+                        CREATE TABLE IF NOT EXISTS leases (
+                            name TEXT PRIMARY KEY,
+                            holder TEXT NOT NULL,
+                            expires_at REAL NOT NULL
+                        );
+                        CREATE TABLE IF NOT EXISTS events (
+                            id INTEGER PRIMARY KEY AUTOINCREMENT,
+                            team TEXT NOT NULL,
+                            student TEXT,
+                            delta REAL NOT NULL,
+                            source TEXT NOT NULL,
+                            timestamp REAL NOT NULL
+                        );
+                    """)
+                    self._ready = True
+        return connection
+
+    def save(self, values, sheet_titles, fetched_at, fetch_times=None):
+        """Replace the stored rows of every dataset in ``values``
+
+        ``fetch_times`` maps datasets fetched at another time than
+        ``fetched_at`` to theirs.
+        """
+        timestamp = fetched_at.timestamp()
+        fetch_times = fetch_times or {}
+        connection = self._connect()
+        try:
+            with connection:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO datasets (key, rows, fetched_at) VALUES (?, ?, ?)",
+                    [(key, json.dumps(rows, ensure_ascii=False),
+                      fetch_times[key].timestamp() if key in fetch_times else timestamp)
+                     for key, rows in values.items()]
+                )
+                connection.execute(
+                    "INSERT OR REPLACE INTO sheet_titles (id, titles, fetched_at) VALUES (1, ?, ?)",
+                    (json.dumps(list(sheet_titles), ensure_ascii=False), timestamp)
+                )
+        finally:
+            connection.close()
+
+    def load(self, keys=None):
+        """Stored ``(values, sheet_titles, fetched_at, fetch_times)``, None if empty
+
+        ``keys`` limits which datasets are read; ``fetched_at`` is the
+        oldest fetch time among them and ``fetch_times`` maps each of them
+        to its own.
+        """
+        if not os.path.exists(self.path):
+            return None
+        connection = self._connect()
+        try:
+            if keys is None:
+                rows = connection.execute("SELECT key, rows, fetched_at FROM datasets").fetchall()
+            else:
+                keys = list(keys)
+                rows = connection.execute(
+                    "SELECT key, rows, fetched_at FROM datasets WHERE key IN ({})".format(
+                        ", ".join("?" * len(keys))),
+                    keys
+                ).fetchall() if keys else []
+            titles = connection.execute(
+                "SELECT titles, fetched_at FROM sheet_titles WHERE id = 1"
+            ).fetchone()
+        finally:
+            connection.close()
+        if titles is None:
+            return None
+
+        values = {
+            key: tuple(tuple(row) for row in json.loads(data))
+            for key, data, _ in rows
+        }
+        fetch_times = {key: datetime.fromtimestamp(fetched_at) for key, _, fetched_at in rows}
+        oldest = min(fetch_times.values(), default=datetime.fromtimestamp(titles[1]))
+        return values, tuple(json.loads(titles[0])), oldest, fetch_times
+
+    def fetch_times(self):
+        """``{key: fetched_at}`` of every stored dataset, as epoch seconds"""
+        if not os.path.exists(self.path):
+            return {}
+        connection = self._connect()
+        try:
+            return dict(connection.execute("SELECT key, fetched_at FROM datasets").fetchall())
+        finally:
+            connection.close()
+
+    # ----- refresh leases, so one process per host fetches at a time -----
+    @staticmethod
+    def _holder():
+        return f"{os.getpid()}:{threading.get_ident()}"
+
+    def acquire(self, name, seconds):
+        """Take the lease ``name`` for ``seconds``; False if someone holds it"""
+        now = time.time()
+        connection = self._connect()
+        connection.isolation_level = None
+        try:
+            # IMMEDIATE takes the write lock up front, so check-and-set is atomic
+            connection.execute("BEGIN IMMEDIATE")
+            row = connection.execute(
+                "SELECT holder, expires_at FROM leases WHERE name = ?", (name,)
+            ).fetchone()
+            if row is not None and row[1] > now and row[0] != self._holder():
+                connection.execute("ROLLBACK")
+                return False
+            connection.execute(
+                "INSERT OR REPLACE INTO leases (name, holder, expires_at) VALUES (?, ?, ?)",
+                (name, self._holder(), now + seconds)
+            )
+            connection.execute("COMMIT")
+            return True
+        finally:
+            connection.close()
+
+    def release(self, name):
+        """Give the lease ``name`` back if this thread holds it"""
+        connection = self._connect()
+        try:
+            with connection:
+                connection.execute(
+                    "DELETE FROM leases WHERE name = ? AND holder = ?", (name, self._holder())
+                )
+        finally:
+            connection.close()
+
+    # ----- point events, shared by every process on the host -----
+    def append_event(self, team, student, delta, source, timestamp):
+        """Log one point event; returns its id"""
+        connection = self._connect()
+        try:
+            with connection:
+                connection.execute(
+                    "DELETE FROM events WHERE timestamp < ?",
+                    (time.time() - EVENT_RETENTION_SECONDS,)
+                )
+                cursor = connection.execute(
+                    "INSERT INTO events (team, student, delta, source, timestamp) VALUES (?, ?, ?, ?, ?)",
+                    (team, student, delta, source, timestamp)
+                )
+                return cursor.lastrowid
+        finally:
+            connection.close()
+
+    def events_after(self, event_id=0):
+        """``(id, team, student, delta, source, timestamp)`` of later events, in id order"""
+        if not os.path.exists(self.path):
+            return []
+        connection = self._connect()
+        try:
+            return connection.execute(
+                "SELECT id, team, student, delta, source, timestamp FROM events WHERE id > ? ORDER BY id",
+                (event_id,)
+            ).fetchall()
+        finally:
+            connection.close()